@@ -0,0 +1,57 @@
+import os
+import time
+import tracemalloc
+import subprocess
+
+
+def measure(func, *args, memory=True, repeat=1, **kwargs):
+    """
+    Функция замера времени и пикового объема памяти.
+    Время замеряется без tracemalloc, память - отдельным запуском
+    :param func: функция, которую нужно замерить
+    :param memory: bool - замерять ли память
+    :param repeat: int - сколько раз замерять время (берется лучшее)
+    :return: результат функции, время в секундах, пиковая память в байтах
+    """
+    seconds = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        func(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result, seconds, peak
+
+
+def get_percentile(values, q):
+    """
+    Функция, которая вычисляет перцентиль
+    :param values: list - значения
+    :param q: float - перцентиль от 0 до 100
+    :return: float - значение перцентиля (None для пустого списка)
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * q / 100), len(values) - 1)]
+
+
+def get_revision():
+    """
+    Функция, которая возвращает текущую ревизию git, если она доступна
+    :return: str - хэш коммита или None
+    """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -1,169 +1,644 @@
+import os
+import sys
+import json
+import heapq
+import hashlib
+from collections import namedtuple
+
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from copy import deepcopy
-
-
-df = pd.read_csv('data.csv')
-df.drop(columns=df.columns[0], inplace=True)
-
-# логарифмируем цену, чтобы изменение цены вычислять в процентах
-# df.price[y] / df.price[x] = np.exp(log_price[y] - log_price[x])
-log_price = np.log(df.price)
-
-# находим точки максимума и минимума
-x_min = []
-x_max = []
-x = []
-N = 4000
-for i in range(len(df.price) // N):
-    x_max.append(N * i + log_price[N * i:N * (i + 1)].argmax())
-    x_min.append(N * i + log_price[N * i:N * (i + 1)].argmin())
-    for k in sorted([x_max[-1], x_min[-1]]):
-        x.append(k)
-
-# выбираем среди подряд идущих максимумов (минимумов)
-# одну максимальную (минимальную)
-for i in range(len(x) - 1):
-    if (x[i] in x_max and x[i + 1] in x_max):
-        if (log_price[x[i]] < log_price[x[i + 1]]):
-            x_max.remove(x[i])
-        else:
-            x_max.remove(x[i + 1])
 
-    if (x[i] in x_min and x[i + 1] in x_min):
-        if (log_price[x[i]] < log_price[x[i + 1]]):
-            x_min.remove(x[i + 1])
-        else:
-            x_min.remove(x[i])
 
-x_min = x_min[:min(len(x_min), len(x_max))]
-x_max = x_max[:min(len(x_min), len(x_max))]
+# цены в виде колонок: timestamp - дата и время в формате YYYYMMDDHHMMSS
+Ticks = namedtuple('Ticks', ['timestamp', 'price', 'log_price'])
 
-X_min = deepcopy(x_min)
-X_max = deepcopy(x_max)
+CACHE_VERSION = 1
+CACHE_COLUMNS = Ticks._fields
+# переменная окружения с директорией кэша
+CACHE_ENV = 'INVESTMENT_CACHE_DIR'
 
 
-def get_min_dif(price=log_price, x_max=X_max, x_min=X_min):
+def get_cache_dir():
     """
-    Функция, которая находит пару (максимум; минимум) с наимаеньшей
-    разностью цен покупки и продажи
-    :param price: pd.Series - массив логарифма цен на акцию за все время
-    :param x_max: list - массив точек максимума
-    :param x_min: list - массив точек минимума
-    :return: int, int - индекс для пары точек, с наимаеньшей разностью
-    между максимумом и минимумом, количество оставшихся точек
+    Функция, которая возвращает директорию кэша по умолчанию:
+    INVESTMENT_CACHE_DIR или investment в пользовательской директории
+    кэша (XDG_CACHE_HOME, LOCALAPPDATA в Windows, иначе ~/.cache)
+    :return: str - путь к директории кэша
     """
-    dif = []
+    path = os.environ.get(CACHE_ENV)
+    if path:
+        return path
+    base = (os.environ.get('XDG_CACHE_HOME')
+            or (os.environ.get('LOCALAPPDATA') if os.name == 'nt' else None)
+            or os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'investment')
 
-    for i in range(len(x_max)):
-        dif.append([log_price[x_max[i]] - log_price[x_min[i]], i])
 
-    return min(dif, key=lambda x: x[0])[1], len(dif)
+def _get_stamp(path):
+    """
+    Функция, которая возвращает отпечаток csv файла,
+    по которому проверяется актуальность кэша
+    :param path: str - путь к csv файлу
+    :return: dict - версия кэша, время изменения и размер файла
+    """
+    stat = os.stat(path)
+    return {
+        'version': CACHE_VERSION,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size
+    }
 
 
-def get_nearest(price, x_min, i):
+def _read_csv(path):
     """
-    Функция, которая находит ближайшую по точке
-    минимума пару (максимум; минимум)
-    :param price: pd.Series - массив логарифма цен на акцию за все время
-    :param x_min: list - массив точек минимума
-    :param i:int - индекс текущей точки
-    :return: индекс ближайшей точки
+    Функция, которая разбирает csv файл
+    :param path: str - путь к csv файлу
+    :return: dict - колонки (имя из CACHE_COLUMNS -> np.ndarray)
     """
-    # выбираем ближайшее по x_min и штрафуем за изменение высоты
-    dist_right = abs(x_min[i] - x_min[i + 1])
-    dist_right += 10**5 * abs(price[x_min[i]] - price[x_min[i + 1]])
-    dist_left = abs(x_min[i] - x_min[i - 1])
-    dist_left += 10**5 * abs(price[x_min[i]] - price[x_min[i - 1]])
+    # pandas нужен только для разбора csv, поэтому импортируется здесь
+    import pandas as pd
 
-    if dist_right < dist_left:
-        return i + 1
-    else:
-        return i - 1
+    df = pd.read_csv(path)
+    df.drop(columns=df.columns[0], inplace=True)
+
+    price = df.price.to_numpy(np.float64)
+    columns = {
+        'timestamp': (df.date.to_numpy(np.int64) * 10**6
+                      + df.time.to_numpy(np.int64)),
+        'price': price,
+        'log_price': np.log(price)
+    }
+    return columns
 
 
-def get_best(x, i, i_alt, func):
+def _write_cache(cache_dir, columns, stamp):
     """
-    Функция, которая выбирает лучшую из двух точек
-    :param x: list - массив, точки которого сравниваются
-    :param i: int индекс текущей точки
-    :param i_alt: индекс (альтернативной) точки, с которой сравниваем текущую
-    :param func: int, int -> bool функция, сравнивающая 2 точки
-    :return: индекс лучшей точки
+    Функция, которая сохраняет колонки в .npy файлы
+    :param cache_dir: str - директория кэша csv файла
+    :param columns: dict - колонки (имя из CACHE_COLUMNS -> np.ndarray)
+    :param stamp: dict - отпечаток csv файла
     """
-    if func(x[i], x[i_alt]):
-        return i
-    else:
-        return i_alt
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    # пока колонки перезаписываются, кэш считается недействительным
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
 
+    for name in CACHE_COLUMNS:
+        tmp_path = os.path.join(cache_dir, name + '.tmp.npy')
+        np.save(tmp_path, columns[name])
+        os.replace(tmp_path, os.path.join(cache_dir, name + '.npy'))
 
-while True:
-    k = input('Введите количество транзакций! (k > 0)\n')
-    if k.isdigit():
-        k = int(k)
-        if (k > 0):
-            break
-        else:
-            print('Введите число > 0')
+    with open(meta_path + '.tmp', 'w') as file:
+        json.dump(stamp, file)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+def load_data(path='data.csv', cache_dir=None):
+    """
+    Функция загрузки цен. При первом запуске csv файл разбирается
+    и сохраняется в бинарный кэш, при следующих запусках колонки
+    отображаются в память без разбора текста. Кэш пересобирается,
+    если изменились время изменения или размер csv. Если кэш
+    не удается записать (директория только для чтения), цены
+    возвращаются без кэша
+    :param path: str - путь к csv файлу с колонками date, time, price
+    :param cache_dir: str - директория кэша (по умолчанию - get_cache_dir()),
+    кэш файла - в поддиректории <имя файла>-<хэш полного пути>
+    :return: Ticks - дата и время, цена и логарифм цены
+    """
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    cache_dir = os.path.join(cache_dir, f'{os.path.basename(path)}-{key}')
+    stamp = _get_stamp(path)
+
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as file:
+            valid = json.load(file) == stamp
+    except (OSError, ValueError):
+        valid = False
+
+    if not valid:
+        columns = _read_csv(path)
+        try:
+            _write_cache(cache_dir, columns, stamp)
+        except OSError:
+            return Ticks(*(columns[name] for name in CACHE_COLUMNS))
+
+    return Ticks(*(
+        np.load(os.path.join(cache_dir, name + '.npy'), mmap_mode='r')
+        for name in CACHE_COLUMNS
+    ))
+
+
+class ExtremumIndex:
+    """
+    Класс для поиска минимума и максимума цены (и их положения)
+    на отрезке тиков [a, b] за O(1). Массив делится на блоки по B точек:
+    для каждой точки хранится положение минимума (максимума) от начала
+    блока до точки и от точки до конца блока, а для целых блоков
+    строится разреженная таблица. Запрос внутри одного блока решается
+    просмотром не более B точек. При равных значениях выбирается
+    первая точка, как у np.argmin и np.argmax
+    """
+    def __init__(self, price, block_size=64):
+        """
+        :param price: np.ndarray - массив цен (или логарифма цен)
+        :param block_size: int - размер блока
+        """
+        self._price = np.asarray(price)
+        self._block_size = block_size
+        self._tables = {}
+        for kind in ('min', 'max'):
+            self._tables[kind] = self._build(kind)
+
+    def __len__(self):
+        return len(self._price)
+
+    @staticmethod
+    def _better(kind):
+        """Функция сравнения: True, если первое значение лучше второго"""
+        return np.less if kind == 'min' else np.greater
+
+    def _build(self, kind):
+        """
+        Функция построения таблиц для минимума или максимума
+        :param kind: str - 'min' или 'max'
+        :return: tuple - положения лучших точек на префиксе и суффиксе
+        блока (смещения внутри блока) и уровни разреженной таблицы
+        """
+        B = self._block_size
+        n = len(self._price)
+        num_blocks = -(-n // B)
+        better = self._better(kind)
+        accumulate = np.minimum if kind == 'min' else np.maximum
+
+        blocks = np.full(num_blocks * B, np.inf if kind == 'min' else -np.inf)
+        blocks[:n] = self._price
+        blocks = blocks.reshape(num_blocks, B)
+        column = np.arange(B)
+
+        # префикс: точка лучше всех предыдущих (строго - выбираем первую)
+        best = accumulate.accumulate(blocks, axis=1)
+        update = np.ones_like(blocks, dtype=bool)
+        update[:, 1:] = better(blocks[:, 1:], best[:, :-1])
+        prefix = np.maximum.accumulate(np.where(update, column, 0), axis=1)
+
+        # суффикс: идем справа налево, при равенстве сдвигаемся влево
+        reverse = blocks[:, ::-1]
+        best = accumulate.accumulate(reverse, axis=1)
+        update[:, 1:] = ~better(best[:, :-1], reverse[:, 1:])
+        suffix = B - 1 - np.maximum.accumulate(
+            np.where(update, column, 0), axis=1
+        )[:, ::-1]
+
+        # разреженная таблица: levels[j][i] - лучшая точка в блоках
+        # с i по i + 2^j - 1
+        levels = [np.arange(num_blocks) * B + prefix[:, -1]]
+        while 2 ** len(levels) <= num_blocks:
+            prev, half = levels[-1], 2 ** (len(levels) - 1)
+            levels.append(self._pick(kind, prev[:-half], prev[half:]))
+
+        offset_type = np.min_scalar_type(B - 1)
+        prefix = prefix.astype(offset_type).ravel()[:n]
+        suffix = suffix.astype(offset_type).ravel()[:n]
+        return prefix, suffix, levels
+
+    def _pick(self, kind, left, right):
+        """
+        Функция, которая выбирает лучшую из двух точек,
+        при равенстве - левую
+        """
+        better = self._better(kind)
+        return np.where(better(self._price[right], self._price[left]),
+                        right, left)
+
+    def _query(self, kind, a, b):
+        """
+        Функция поиска положения лучшей точки на отрезках [a, b]
+        :param kind: str - 'min' или 'max'
+        :param a: np.ndarray - начала отрезков
+        :param b: np.ndarray - концы отрезков (включительно)
+        :return: np.ndarray - положения лучших точек
+        """
+        B = self._block_size
+        prefix, suffix, levels = self._tables[kind]
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=np.int64),
+                                   np.asarray(b, dtype=np.int64))
+        if np.any((a < 0) | (a > b) | (b >= len(self._price))):
+            raise IndexError('Отрезок вне массива цен!')
+
+        first, last = a // B, b // B
+        result = np.empty(a.shape, dtype=np.int64)
+
+        # отрезок внутри одного блока: просматриваем его целиком
+        same = first == last
+        if np.any(same):
+            start = a[same]
+            window = start[:, None] + np.arange(B)
+            outside = window > b[same][:, None]
+            value = self._price[np.minimum(window, len(self._price) - 1)]
+            value = np.where(outside,
+                             np.inf if kind == 'min' else -np.inf, value)
+            best = value.argmin(axis=1) if kind == 'min' \
+                else value.argmax(axis=1)
+            result[same] = start + best
+
+        # иначе: суффикс первого блока, целые блоки, префикс последнего
+        other = ~same
+        if np.any(other):
+            a, b = a[other], b[other]
+            first, last = first[other], last[other]
+            best = first * B + suffix[a]
+
+            middle = last - first > 1
+            lo, hi = first[middle] + 1, last[middle] - 1
+            level = np.floor(np.log2(hi - lo + 1)).astype(np.int64)
+            inner = np.empty(len(lo), dtype=np.int64)
+            for j in np.unique(level):
+                mask = level == j
+                inner[mask] = self._pick(
+                    kind, levels[j][lo[mask]],
+                    levels[j][hi[mask] - 2 ** j + 1]
+                )
+            best[middle] = self._pick(kind, best[middle], inner)
+
+            result[other] = self._pick(kind, best, last * B + prefix[b])
+
+        return result
+
+    def argmin(self, a, b):
+        """
+        Функция поиска положения минимума на отрезках [a, b]
+        :param a: int или np.ndarray - начала отрезков
+        :param b: int или np.ndarray - концы отрезков (включительно)
+        :return: int или np.ndarray - положения минимумов
+        """
+        result = self._query('min', a, b)
+        return int(result) if result.ndim == 0 else result
+
+    def argmax(self, a, b):
+        """
+        Функция поиска положения максимума на отрезках [a, b]
+        :param a: int или np.ndarray - начала отрезков
+        :param b: int или np.ndarray - концы отрезков (включительно)
+        :return: int или np.ndarray - положения максимумов
+        """
+        result = self._query('max', a, b)
+        return int(result) if result.ndim == 0 else result
+
+    def query(self, a, b):
+        """
+        Функция поиска наименьшей и наибольшей цены на отрезках [a, b]
+        :param a: int или np.ndarray - начала отрезков
+        :param b: int или np.ndarray - концы отрезков (включительно)
+        :return: минимум, положение минимума, максимум, положение максимума
+        """
+        x_min, x_max = self.argmin(a, b), self.argmax(a, b)
+        return self._price[x_min], x_min, self._price[x_max], x_max
+
+
+def find_extrema(price, N=4000, index=None):
+    """
+    Функция, которая находит точки максимума и минимума в каждом блоке
+    из N точек (последний блок может быть неполным) и среди подряд идущих
+    максимумов (минимумов) оставляет один наибольший (наименьший)
+    :param price: np.ndarray - массив логарифма цен на акцию за все время
+    :param N: int - размер блока
+    :param index: ExtremumIndex - готовый индекс по price; если задан,
+    экстремумы блоков берутся из него, а не пересчитываются
+    :return: np.ndarray, np.ndarray - точки минимума, точки максимума
+    """
+    price = np.asarray(price)
+    full = len(price) // N * N
+
+    if index is not None:
+        start = np.arange(0, len(price), N)
+        end = np.minimum(start + N, len(price)) - 1
+        x_min, x_max = index.argmin(start, end), index.argmax(start, end)
     else:
-        print('Введите ЧИСЛО!')
+        blocks = price[:full].reshape(-1, N)
+        start = np.arange(0, full, N)
+        x_min = start + blocks.argmin(axis=1)
+        x_max = start + blocks.argmax(axis=1)
+        if full < len(price):
+            x_min = np.r_[x_min, full + price[full:].argmin()]
+            x_max = np.r_[x_max, full + price[full:].argmax()]
+
+    # внутри блока упорядочиваем точки по времени
+    max_first = x_max < x_min
+    x = np.column_stack((np.minimum(x_min, x_max),
+                         np.maximum(x_min, x_max))).ravel()
+    is_max = np.column_stack((max_first, ~max_first)).ravel()
+    if len(x) == 0:
+        return x, x
+
+    # выбираем среди подряд идущих максимумов (минимумов)
+    # одну максимальную (минимальную): первую из лучших в серии
+    run_start = np.flatnonzero(np.r_[True, is_max[1:] != is_max[:-1]])
+    run = np.cumsum(np.r_[True, is_max[1:] != is_max[:-1]]) - 1
+    value = np.where(is_max, price[x], -price[x])
+    best = np.flatnonzero(value == np.maximum.reduceat(value, run_start)[run])
+    best = best[np.r_[True, run[best][1:] != run[best][:-1]]]
+
+    x, is_max = x[best], is_max[best]
+    return x[~is_max], x[is_max]
+
+
+def get_turning_points(price):
+    """
+    Функция, которая находит чередующиеся точки локального минимума
+    и максимума (впадина, пик, впадина, пик, ...). Последовательность
+    всегда начинается с впадины и заканчивается пиком, на горизонтальных
+    участках выбирается первая точка
+    :param price: np.ndarray - массив цен
+    :return: np.ndarray - индексы точек поворота
+    """
+    price = np.asarray(price)
 
-diff = get_min_dif()
+    # оставляем только точки, в которых цена изменилась
+    x = np.flatnonzero(np.r_[True, price[1:] != price[:-1]])
+    if len(x) < 2:
+        return x[:0]
 
-while diff[1] > k:
+    # точка поворота - точка, в которой меняется знак приращения цены
+    sign = np.sign(np.diff(price[x]))
+    x = x[np.r_[0, np.flatnonzero(sign[1:] != sign[:-1]) + 1, len(x) - 1]]
 
-    indx = diff[0]
+    # отбрасываем начальный пик и конечную впадину
+    if sign[0] < 0:
+        x = x[1:]
+    if sign[-1] < 0:
+        x = x[:-1]
+    return x
 
-    # выбираем ближайшую точку, обрабатываем крайние точки
-    if (indx == 0):
-        x_nearest = indx + 1
-    elif(indx == len(X_max) - 1):
-        x_nearest = indx - 1
-    else:
-        x_nearest = get_nearest(log_price, X_min, indx)
 
-    ind_min_best = get_best(
-        X_min, indx, x_nearest,
-        lambda x, x_alt: log_price[x] < log_price[x_alt]
-    )
-    x_min_best = X_min[ind_min_best]
+def reduce_transactions(price, k, history=False):
+    """
+    Функция, которая оставляет не более k самых выгодных транзакций.
+    На каждом шаге удаляется ребро (пара соседних точек поворота)
+    с наименьшим изменением цены: удаление подъема - отказ от сделки,
+    удаление спуска - объединение двух соседних сделок в одну.
+    Оба действия уменьшают количество сделок на 1, а прибыль на величину
+    ребра, поэтому выбор минимального ребра дает точный оптимум.
+    Ребра хранятся в куче, точки - в двусвязном списке: O(n log n)
+    :param price: np.ndarray - цены в точках поворота (впадина, пик, ...)
+    :param k: int - максимальное количество транзакций
+    :param history: bool - вернуть также историю удалений
+    :return: np.ndarray - маска оставшихся точек; если history=True,
+    то еще np.ndarray - номер шага, на котором удалена точка (-1, если
+    точка осталась), и np.ndarray - потеря прибыли на каждом шаге
+    """
+    price = np.asarray(price).tolist()
+    n = len(price)
+    alive = [True] * n
+    step = [-1] * n
+    cost = []
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+
+    edges = [(abs(price[i + 1] - price[i]), i, i + 1) for i in range(n - 1)]
+    heapq.heapify(edges)
+
+    count = n // 2
+    while count > k:
+        dif, i, j = heapq.heappop(edges)
+        # ребро устарело: одна из точек удалена или у точки новый сосед
+        if not (alive[i] and alive[j] and nxt[i] == j):
+            continue
+
+        alive[i] = alive[j] = False
+        step[i] = step[j] = len(cost)
+        cost.append(dif)
+        left, right = prev[i], nxt[j]
+        if left >= 0:
+            nxt[left] = right
+        if right < n:
+            prev[right] = left
+        if left >= 0 and right < n:
+            heapq.heappush(
+                edges, (abs(price[right] - price[left]), left, right)
+            )
+        count -= 1
+
+    if history:
+        return (np.array(alive, dtype=bool), np.array(step, dtype=np.int64),
+                np.array(cost, dtype=np.float64))
+    return np.array(alive, dtype=bool)
+
+
+def get_best_transactions(price, x_min, x_max, k):
+    """
+    Функция, которая выбирает не более k непересекающихся пар
+    (минимум; максимум) с наибольшей суммарной прибылью
+    :param price: np.ndarray - массив логарифма цен на акцию за все время
+    :param x_min: list - массив точек минимума
+    :param x_max: list - массив точек максимума
+    :param k: int - максимальное количество транзакций
+    :return: list, list - точки покупки и точки продажи
+    """
+    price = np.asarray(price)
 
-    # удаляем худшую из 2 точек: текущей и альтернативной ближайшей
-    if (x_nearest < indx and ind_min_best == indx):
-        X_min.pop(indx)
-        X_max.pop(indx)
-    else:
-        if (ind_min_best == indx):
-            X_min.pop(x_nearest)
-        else:
-            X_min.pop(indx)
+    x = np.union1d(x_min, x_max).astype(np.int64)
+    x = x[get_turning_points(price[x])]
+    x = x[reduce_transactions(price[x], k)]
+
+    return x[::2].tolist(), x[1::2].tolist()
+
+
+def get_profit_curve(price, x_min, x_max, K=None, trades=False):
+    """
+    Функция, которая за одно сокращение находит наибольшую прибыль
+    для каждого количества транзакций от 1 до K. Сокращение проходит
+    через все промежуточные k, поэтому прибыль для k - это общая прибыль
+    за вычетом потерь первых (m - k) шагов, где m - число всех сделок
+    :param price: np.ndarray - массив логарифма цен на акцию за все время
+    :param x_min: list - массив точек минимума
+    :param x_max: list - массив точек максимума
+    :param K: int - наибольшее количество транзакций
+    (по умолчанию - количество всех возможных сделок)
+    :param trades: bool - вернуть также точки покупки и продажи для каждого k
+    :return: np.ndarray - прибыль (в логарифмах цен) для k = 1, ..., K;
+    если trades=True, то еще list - пары списков (X_min, X_max) для каждого k
+    """
+    price = np.asarray(price)
+
+    x = np.union1d(x_min, x_max).astype(np.int64)
+    x = x[get_turning_points(price[x])]
+    m = len(x) // 2
+    K = m if K is None else K
+
+    _, step, cost = reduce_transactions(price[x], 1, history=True)
+    total = np.sum(price[x[1::2]] - price[x[::2]])
+    lost = np.r_[0, np.cumsum(cost)]
 
-        if (X_max[indx] > x_min_best and X_max[x_nearest] > x_min_best):
+    k = np.arange(1, K + 1)
+    profit = total - lost[np.clip(m - k, 0, len(cost))]
+    if m == 0:
+        profit[:] = 0
+    if not trades:
+        return profit
 
-            if (indx == get_best(
-                    X_max, indx, x_nearest,
-                    lambda x, x_alt: log_price[x] > log_price[x_alt])):
-                X_max.pop(x_nearest)
+    sets = []
+    for i in k:
+        points = x[(step == -1) | (step >= m - i)]
+        sets.append((points[::2].tolist(), points[1::2].tolist()))
+    return profit, sets
+
+
+class OnlineStrategy:
+    """
+    Класс, который поддерживает оптимальную стратегию из не более k сделок
+    для потока цен. Хранятся не все тики, а только кандидаты:
+    точки k лучших закрытых сделок и k лучших сделок с открытой в конце
+    позицией (любой оптимальный план для продолжения потока собирается
+    из них и новых тиков), плюс буфер новых тиков. Буфер сжимается,
+    когда его длина сравнивается с количеством кандидатов, поэтому
+    амортизированная стоимость одного тика - O(log k)
+    """
+    def __init__(self, k, capital):
+        """
+        :param k: int - максимальное количество транзакций
+        :param capital: float - начальный капитал
+        """
+        if k < 1:
+            raise ValueError('Количество транзакций должно быть больше 0!')
+        self._k = k
+        self._capital = capital
+        self._count = 0
+        self._buffer_size = max(4 * k + 4, 256)
+
+        # кандидаты и буфер: номер тика, дата и время, цена
+        self._index = []
+        self._timestamp = []
+        self._price = []
+        self._num_candidates = 0
+
+    @property
+    def k(self):
+        return self._k
+
+    @property
+    def count(self):
+        return self._count
+
+    def push(self, date, time, price):
+        """
+        Функция добавления нового тика
+        :param date: int - дата в формате YYYYMMDD
+        :param time: int - время в формате HHMMSS
+        :param price: float - цена
+        """
+        self._index.append(self._count)
+        self._timestamp.append(date * 10**6 + time)
+        self._price.append(price)
+        self._count += 1
+
+        if len(self._index) - self._num_candidates >= self._buffer_size:
+            self._compress()
+
+    @staticmethod
+    def _select(log_price, k, open_end=False):
+        """
+        Функция, которая выбирает точки оптимального плана
+        :param log_price: np.ndarray - логарифм цен кандидатов и буфера
+        :param k: int - максимальное количество транзакций
+        :param open_end: bool - разрешить незакрытую в конце покупку
+        (к ценам добавляется бесконечно большая цена продажи)
+        :return: np.ndarray - индексы точек покупки и продажи
+        """
+        if open_end:
+            log_price = np.r_[log_price, np.inf]
+
+        x = get_turning_points(log_price)
+        x = x[reduce_transactions(log_price[x], k)]
+
+        if open_end:
+            x = x[:-1]
+        return x
+
+    def _compress(self):
+        """Функция, которая оставляет в буфере только кандидатов"""
+        log_price = np.log(self._price)
+        keep = np.union1d(
+            self._select(log_price, self._k),
+            self._select(log_price, self._k + 1, open_end=True)
+        )
+
+        self._index = [self._index[i] for i in keep]
+        self._timestamp = [self._timestamp[i] for i in keep]
+        self._price = [self._price[i] for i in keep]
+        self._num_candidates = len(keep)
+
+    def _get_plan(self):
+        """
+        Функция, которая находит текущий оптимальный план
+        :return: np.ndarray - индексы (в буфере) точек покупки и продажи
+        """
+        if len(self._price) < 2:
+            return np.zeros(0, dtype=np.int64)
+        return self._select(np.log(self._price), self._k)
+
+    @property
+    def plan(self):
+        """
+        Текущий оптимальный план
+        :return: list, list - номера тиков покупки и продажи
+        """
+        x = np.array(self._index, dtype=np.int64)[self._get_plan()]
+        return x[::2].tolist(), x[1::2].tolist()
+
+    def get_trades(self):
+        """
+        Функция, которая возвращает сделки текущего плана
+        :return: list - кортежи (дата и время покупки, цена покупки,
+        дата и время продажи, цена продажи) в формате YYYYMMDDHHMMSS
+        """
+        x = self._get_plan()
+        return [
+            (self._timestamp[buy], self._price[buy],
+             self._timestamp[sell], self._price[sell])
+            for buy, sell in zip(x[::2], x[1::2])
+        ]
+
+    def get_pnl(self):
+        """
+        Функция, которая вычисляет прибыль текущего плана.
+        Сделка, продажа в которой приходится на последний тик,
+        считается открытой позицией
+        :return: float, float - реализованная и нереализованная прибыль
+        """
+        capital = self._capital
+        unrealised = 0
+        last = len(self._price) - 1
+
+        x = self._get_plan()
+        for buy, sell in zip(x[::2], x[1::2]):
+            num_stock = capital // self._price[buy]
+            profit = num_stock * (self._price[sell] - self._price[buy])
+            if sell == last:
+                unrealised = round(profit, 2)
             else:
-                X_max.pop(indx)
-        elif (X_max[x_nearest] > x_min_best):
-            X_max.pop(indx)
-        else:
-            X_max.pop(x_nearest)
+                capital = round(capital + profit, 2)
 
-    diff = get_min_dif()
+        return round(capital - self._capital, 2), unrealised
 
-while True:
-    capital = input('Введите размер капитала (>=2000)\n')
-    if capital.isdigit():
-        capital = int(capital)
-        if (capital >= 2000):
-            break
-        else:
-            print('Капитал слишком маленький! Введите число больше 2000!')
-    else:
-        print('Введите ЧИСЛО!')
+
+def get_capital(price, X_min, X_max, capital):
+    """
+    Функция, которая вычисляет итоговый капитал стратегии:
+    при каждой покупке на весь капитал покупается целое число акций
+    :param price: np.ndarray - массив цен на акцию за все время
+    :param X_min: list - точки покупки
+    :param X_max: list - точки продажи
+    :param capital: float - начальный капитал
+    :return: float - итоговый капитал
+    """
+    for buy, sell in zip(X_min, X_max):
+        num_stock = capital // price[buy]
+        capital = round(capital - num_stock * price[buy]
+                        + num_stock * price[sell], 2)
+    return capital
 
 
 def get_date_time(int_date_time):
@@ -176,32 +651,256 @@ def get_date_time(int_date_time):
             + "{:02}".format(int_date_time % 100))
 
 
-def join_date_time(ind):
+def join_date_time(timestamp):
     "Функция, которая объединяет дату и время в одну строку"
-    return get_date_time(df.date[ind]) + " " + get_date_time(df.time[ind])
+    return (get_date_time(timestamp // 10**6) + " "
+            + get_date_time(timestamp % 10**6))
 
 
-for i in range(k):
-    num_stock = capital // df.price[X_min[i]]
+REPORT_HEADER = b'date_time,action,num_stock,value,capital\n'
 
-    print('Покупка акций '
-          + join_date_time(X_min[i]) + " "
-          + f'в количестве {num_stock}.')
-    print('Стоимость акций в портфеле: '
-          f'{round(num_stock * df.price[X_min[i]], 2)}')
 
-    # выводим промежуточные состояния портфеля
-    for j in range(X_min[i] + 1, X_max[i]):
-        print('Стоимость акций в портфеле '
-              + join_date_time(j) + ": "
-              f'{round(num_stock * df.price[j], 2)}')
+def format_date_time(timestamp):
+    """
+    Функция, которая преобразует массив дат и времени в формате
+    YYYYMMDDHHMMSS в строки как join_date_time. Цифры вычисляются
+    арифметикой сразу для всего массива, без форматирования каждой строки
+    :param timestamp: np.ndarray - даты и время
+    :return: np.ndarray - строки (bytes)
+    """
+    timestamp = np.asarray(timestamp, dtype=np.int64)
+    date, time = timestamp // 10**6, timestamp % 10**6
+    parts = [date // 10**4, date // 100 % 100, date % 100,
+             time // 10**4, time // 100 % 100, time % 100]
+    width = [max(2, len(str(parts[0].max(initial=0))))] + [2] * 5
+    separators = b'.. ..'
+
+    buf = np.empty((len(timestamp), sum(width) + 5), dtype=np.uint8)
+    pos = 0
+    for i in range(len(parts)):
+        for j in range(width[i]):
+            buf[:, pos] = parts[i] // 10**(width[i] - 1 - j) % 10 + ord('0')
+            pos += 1
+        if i < len(separators):
+            buf[:, pos] = separators[i]
+            pos += 1
+
+    return buf.view(f'S{buf.shape[1]}').ravel()
+
+
+def format_money(value):
+    """
+    Функция, которая преобразует массив сумм в строки с двумя знаками
+    после точки, аналогично format_date_time - арифметикой для всего массива
+    :param value: np.ndarray - неотрицательные суммы
+    :return: np.ndarray - строки (bytes)
+    """
+    cents = np.rint(np.asarray(value) * 100).astype(np.int64)
+    whole = cents // 100
+    num_digits = np.maximum(1, np.floor(np.log10(np.maximum(whole, 1))) + 1)
+    width = int(num_digits.max(initial=1))
+
+    # цифры прижаты влево, нулевые байты в конце строки отбрасываются
+    power = num_digits[:, None].astype(np.int64) - 1 - np.arange(width)
+    buf = np.where(power >= 0,
+                   whole[:, None] // 10**np.maximum(power, 0) % 10 + ord('0'),
+                   0).astype(np.uint8)
+    fraction = np.column_stack((np.full(len(cents), ord('.')),
+                                cents // 10 % 10 + ord('0'),
+                                cents % 10 + ord('0'))).astype(np.uint8)
+
+    return np.char.add(buf.view(f'S{width}').ravel(),
+                       fraction.view('S3').ravel())
+
+
+def write_report(path, ticks, X_min, X_max, capital, every=1,
+                 summary=False, chunk_size=2**16):
+    """
+    Функция, которая записывает в csv файл состояние портфеля
+    на каждом тике между покупкой и продажей. Стоимость портфеля
+    вычисляется срезами массива цен, строки форматируются блоками
+    :param path: str - путь к файлу или бинарный файловый объект
+    :param ticks: Ticks - дата и время, цены
+    :param X_min: list - точки покупки
+    :param X_max: list - точки продажи
+    :param capital: float - начальный капитал
+    :param every: int - записывать каждый every-й тик внутри сделки
+    :param summary: bool - записывать только покупки и продажи
+    :param chunk_size: int - количество строк, форматируемых за раз
+    :return: float - итоговый капитал
+    """
+    file = open(path, 'wb', buffering=2**20) if isinstance(path, str) \
+        else path
+    try:
+        file.write(REPORT_HEADER)
+        for buy, sell in zip(X_min, X_max):
+            num_stock = capital // ticks.price[buy]
+            cash = capital - num_stock * ticks.price[buy]
+
+            if summary:
+                ind = np.array([buy, sell])
+            else:
+                ind = np.r_[buy, np.arange(buy + 1, sell, every), sell]
+            action = np.full(len(ind), b'hold', dtype='S4')
+            action[0], action[-1] = b'buy', b'sell'
+
+            for i in range(0, len(ind), chunk_size):
+                part = ind[i:i + chunk_size]
+                value = num_stock * np.asarray(ticks.price[part])
+                lines = format_date_time(ticks.timestamp[part])
+                for column in (action[i:i + chunk_size],
+                               f'{num_stock:.0f}'.encode(),
+                               format_money(value),
+                               format_money(cash + value)):
+                    lines = np.char.add(np.char.add(lines, b','), column)
+                file.write(b'\n'.join(lines.tolist()) + b'\n')
+
+            capital = round(cash + num_stock * ticks.price[sell], 2)
+    finally:
+        if isinstance(path, str):
+            file.close()
+    return capital
+
+
+def read_k():
+    """
+    Функция, которая получает от пользователя количество транзакций
+    :return: int - количество транзакций
+    """
+    while True:
+        k = input('Введите количество транзакций! (k > 0)\n')
+        if k.isdigit():
+            k = int(k)
+            if (k > 0):
+                return k
+            else:
+                print('Введите число > 0')
+        else:
+            print('Введите ЧИСЛО!')
+
+
+def read_capital():
+    """
+    Функция, которая получает от пользователя размер капитала
+    :return: int - размер капитала
+    """
+    while True:
+        capital = input('Введите размер капитала (>=2000)\n')
+        if capital.isdigit():
+            capital = int(capital)
+            if (capital >= 2000):
+                return capital
+            else:
+                print('Капитал слишком маленький! Введите число больше 2000!')
+        else:
+            print('Введите ЧИСЛО!')
 
-    print('Продажа акций '
-          + join_date_time(X_max[i]) + " "
-          + f'в количестве {num_stock}.')
 
-    capital = round(capital - num_stock * df.price[X_min[i]]
-                    + num_stock * df.price[X_max[i]], 2)
-    print(f'Капитал: {capital}')
+def parse_args(argv=None):
+    """
+    Функция разбора аргументов командной строки.
+    Если k или капитал не заданы, они запрашиваются с клавиатуры;
+    без терминала (ввод перенаправлен) их нужно задать аргументами
+    :param argv: list - аргументы (по умолчанию - sys.argv)
+    :return: argparse.Namespace - аргументы
+    """
+    import argparse
 
-print(f'Итоговый размер капитала: {capital}')
+    parser = argparse.ArgumentParser(
+        description='Стратегия покупки-продажи акций из k транзакций'
+    )
+    parser.add_argument('-f', '--file', default='data.csv',
+                        help='csv файл с колонками date, time, price')
+    parser.add_argument('-k', type=int,
+                        help='максимальное количество транзакций')
+    parser.add_argument('-c', '--capital', type=float,
+                        help='размер капитала (>= 2000)')
+    parser.add_argument('--block', type=int, default=4000,
+                        help='размер блока для поиска максимумов и минимумов')
+    parser.add_argument('--curve', type=int, default=20,
+                        help='вывести прибыль для k от 1 до CURVE '
+                             '(0 - не выводить)')
+    parser.add_argument('--cache-dir',
+                        help='директория кэша цен (по умолчанию - '
+                             f'{CACHE_ENV} или пользовательский кэш)')
+    parser.add_argument('--report', default='report.csv',
+                        help='файл отчета о стоимости портфеля')
+    parser.add_argument('--no-report', action='store_true',
+                        help='не записывать отчет')
+    parser.add_argument('--every', type=int, default=1,
+                        help='записывать в отчет каждый EVERY-й тик')
+    parser.add_argument('--summary', action='store_true',
+                        help='записывать в отчет только покупки и продажи')
+    args = parser.parse_args(argv)
+
+    if args.k is not None and args.k < 1:
+        parser.error('количество транзакций должно быть больше 0')
+    if args.capital is not None and args.capital < 2000:
+        parser.error('капитал должен быть не меньше 2000')
+    if args.block < 1:
+        parser.error('размер блока должен быть больше 0')
+    if args.every < 1:
+        parser.error('EVERY должно быть больше 0')
+    if not sys.stdin.isatty():
+        if args.k is None:
+            parser.error('без терминала нужно задать -k')
+        if args.capital is None:
+            parser.error('без терминала нужно задать --capital')
+    return args
+
+
+def main(argv=None):
+    """
+    Функция расчета стратегии
+    :param argv: list - аргументы командной строки
+    """
+    args = parse_args(argv)
+    ticks = load_data(args.file, args.cache_dir)
+
+    # логарифмируем цену, чтобы изменение цены вычислять в процентах
+    # price[y] / price[x] = np.exp(log_price[y] - log_price[x])
+    log_price = ticks.log_price
+
+    # находим точки максимума и минимума
+    x_min, x_max = find_extrema(log_price, args.block)
+
+    # выводим прибыль для каждого количества транзакций,
+    # чтобы было проще выбрать k
+    if args.curve > 0:
+        profit = get_profit_curve(log_price, x_min, x_max, K=args.curve)
+        print('Прибыль в зависимости от количества транзакций:')
+        for k in range(len(profit)):
+            print(f'{k + 1}: {round(100 * np.expm1(profit[k]), 2)}%')
+
+    k = args.k if args.k is not None else read_k()
+    X_min, X_max = get_best_transactions(log_price, x_min, x_max, k)
+    capital = args.capital if args.capital is not None else read_capital()
+
+    # промежуточные состояния портфеля записываем в отчет
+    if not args.no_report:
+        write_report(args.report, ticks, X_min, X_max, capital,
+                     every=args.every, summary=args.summary)
+
+    for i in range(len(X_min)):
+        num_stock = capital // ticks.price[X_min[i]]
+
+        print('Покупка акций '
+              + join_date_time(ticks.timestamp[X_min[i]]) + " "
+              + f'в количестве {num_stock}.')
+        print('Стоимость акций в портфеле: '
+              f'{round(num_stock * ticks.price[X_min[i]], 2)}')
+        print('Продажа акций '
+              + join_date_time(ticks.timestamp[X_max[i]]) + " "
+              + f'в количестве {num_stock}.')
+
+        capital = round(capital - num_stock * ticks.price[X_min[i]]
+                        + num_stock * ticks.price[X_max[i]], 2)
+        print(f'Капитал: {capital}')
+
+    print(f'Итоговый размер капитала: {capital}')
+    if not args.no_report:
+        print(f'Стоимость портфеля на каждом тике сохранена в {args.report}')
+
+
+if __name__ == '__main__':
+    main()
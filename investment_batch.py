@@ -0,0 +1,180 @@
+import os
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from investment import (load_data, find_extrema, get_profit_curve,
+                        get_capital, CACHE_ENV)
+
+
+def get_files(pattern):
+    """
+    Функция, которая находит файлы с ценами
+    :param pattern: str - директория (берутся все .csv файлы) или шаблон glob
+    :return: list - пути к файлам
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.csv')
+    return sorted(glob.glob(pattern))
+
+
+def get_chunks(files, chunk_size, workers=None):
+    """
+    Функция, которая группирует файлы в задания для пула процессов:
+    маленькие файлы объединяются, пока суммарный размер задания
+    не достигнет chunk_size, большие файлы идут отдельными заданиями.
+    Чтобы работа досталась каждому процессу, размер задания
+    не больше общего размера / (workers * 4)
+    :param files: list - пути к файлам
+    :param chunk_size: int - наибольший размер задания в байтах
+    :param workers: int - количество процессов (по умолчанию - число ядер)
+    :return: list - списки путей к файлам
+    """
+    workers = workers or os.cpu_count() or 1
+    total = sum(map(os.path.getsize, files))
+    chunk_size = max(min(chunk_size, total // (workers * 4)), 1)
+
+    chunks = []
+    chunk = []
+    size = 0
+
+    # большие файлы отправляем первыми, чтобы в конце не ждать одного процесса
+    for path in sorted(files, key=os.path.getsize, reverse=True):
+        chunk.append(path)
+        size += os.path.getsize(path)
+        if size >= chunk_size:
+            chunks.append(chunk)
+            chunk = []
+            size = 0
+
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def run_instrument(path, k, capital, N=4000, cache_dir=None):
+    """
+    Функция расчета стратегии для одного инструмента
+    :param path: str - путь к файлу с ценами
+    :param k: list - количества транзакций
+    :param capital: float - начальный капитал
+    :param N: int - размер блока для поиска максимумов и минимумов
+    :param cache_dir: str - директория кэша цен (см. load_data)
+    :return: list - строки итоговой таблицы (по одной на каждое k)
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    try:
+        ticks = load_data(path, cache_dir)
+        x_min, x_max = find_extrema(ticks.log_price, N)
+        profit, trades = get_profit_curve(
+            ticks.log_price, x_min, x_max, K=max(k), trades=True
+        )
+    except Exception as error:
+        return [{'instrument': name, 'k': val, 'error': repr(error)}
+                for val in k]
+
+    rows = []
+    for val in k:
+        X_min, X_max = trades[val - 1]
+        rows.append({
+            'instrument': name,
+            'k': val,
+            'ticks': len(ticks.price),
+            'trades': len(X_min),
+            'profit_pct': round(100 * np.expm1(profit[val - 1]), 2),
+            'capital': get_capital(ticks.price, X_min, X_max, capital),
+            'error': None
+        })
+    return rows
+
+
+def run_chunk(paths, k, capital, N=4000, cache_dir=None):
+    """
+    Функция расчета стратегии для группы инструментов (одно задание пула)
+    :param paths: list - пути к файлам с ценами
+    :param k: list - количества транзакций
+    :param capital: float - начальный капитал
+    :param N: int - размер блока для поиска максимумов и минимумов
+    :param cache_dir: str - директория кэша цен (см. load_data)
+    :return: list - строки итоговой таблицы
+    """
+    rows = []
+    for path in paths:
+        rows += run_instrument(path, k, capital, N, cache_dir)
+    return rows
+
+
+def run_batch(files, k, capital, workers=None, chunk_size=64 * 2**20,
+              N=4000, cache_dir=None):
+    """
+    Функция расчета стратегии для множества инструментов в пуле процессов
+    :param files: list - пути к файлам с ценами
+    :param k: list - количества транзакций
+    :param capital: float - начальный капитал
+    :param workers: int - количество процессов (по умолчанию - число ядер)
+    :param chunk_size: int - наибольший размер задания в байтах
+    :param N: int - размер блока для поиска максимумов и минимумов
+    :param cache_dir: str - директория кэша цен (см. load_data)
+    :return: pd.DataFrame - итоговая таблица по всем инструментам
+    """
+    chunks = get_chunks(files, chunk_size, workers)
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = [pool.submit(run_chunk, chunk, k, capital, N, cache_dir)
+                 for chunk in chunks]
+        for task in tasks:
+            rows += task.result()
+
+    columns = ['instrument', 'k', 'ticks', 'trades',
+               'profit_pct', 'capital', 'error']
+    summary = pd.DataFrame(rows, columns=columns)
+    summary = summary.astype({'ticks': 'Int64', 'trades': 'Int64'})
+    return summary.sort_values(['instrument', 'k'], ignore_index=True)
+
+
+def main():
+    """Функция запуска расчета для множества инструментов"""
+    parser = argparse.ArgumentParser(
+        description='Расчет стратегии для множества инструментов'
+    )
+    parser.add_argument('data',
+                        help='директория с .csv файлами или шаблон glob')
+    parser.add_argument('-k', default='1',
+                        help='количества транзакций через запятую: 1,2,5')
+    parser.add_argument('--capital', type=float, default=2000,
+                        help='начальный капитал')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='количество процессов')
+    parser.add_argument('--chunk-size', type=float, default=64,
+                        help='наибольший размер задания в мегабайтах')
+    parser.add_argument('--block', type=int, default=4000,
+                        help='размер блока для поиска максимумов и минимумов')
+    parser.add_argument('--cache-dir',
+                        help='директория кэша цен (по умолчанию - '
+                             f'{CACHE_ENV} или пользовательский кэш)')
+    parser.add_argument('-o', '--output',
+                        help='файл для сохранения итоговой таблицы (.csv)')
+    args = parser.parse_args()
+
+    k = sorted({int(val) for val in args.k.split(',')})
+    if k[0] < 1:
+        parser.error('количество транзакций должно быть больше 0')
+
+    files = get_files(args.data)
+    if not files:
+        parser.error(f'не найдено файлов: {args.data}')
+
+    summary = run_batch(files, k, args.capital, args.workers,
+                        int(args.chunk_size * 2**20), args.block,
+                        args.cache_dir)
+    if args.output:
+        summary.to_csv(args.output, index=False)
+    print(summary.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
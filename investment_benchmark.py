@@ -0,0 +1,199 @@
+import os
+import json
+import platform
+import argparse
+
+import numpy as np
+
+from benchmark_utils import measure, get_revision
+from investment import (Ticks, find_extrema, get_best_transactions,
+                        get_profit_curve, write_report)
+
+
+def gbm(n, rng, sigma=10**-3, mu=0):
+    """
+    Функция генерации цен геометрическим броуновским движением
+    :param n: int - количество тиков
+    :param rng: np.random.Generator - генератор случайных чисел
+    :param sigma: float - волатильность за один тик
+    :param mu: float - снос за один тик
+    :return: np.ndarray - цены
+    """
+    step = rng.normal(mu - sigma**2 / 2, sigma, n)
+    return 100 * np.exp(np.cumsum(step))
+
+
+def regime(n, rng, mean_length=10**4):
+    """
+    Функция генерации цен с переключением режимов: рост, падение,
+    боковик с разной волатильностью. Длины режимов распределены
+    геометрически со средним mean_length
+    :param n: int - количество тиков
+    :param rng: np.random.Generator - генератор случайных чисел
+    :param mean_length: int - средняя длина режима
+    :return: np.ndarray - цены
+    """
+    drift = np.array([2 * 10**-5, -2 * 10**-5, 0])
+    sigma = np.array([5 * 10**-4, 10**-3, 3 * 10**-4])
+
+    lengths = rng.geometric(1 / mean_length, n // mean_length * 2 + 2)
+    while lengths.sum() < n:
+        lengths = np.r_[lengths, rng.geometric(1 / mean_length, len(lengths))]
+    state = np.repeat(rng.integers(0, len(drift), len(lengths)), lengths)[:n]
+
+    return 100 * np.exp(np.cumsum(rng.normal(drift[state], sigma[state])))
+
+
+def flat(n, rng, sigma=0.05):
+    """
+    Функция генерации цен без тренда: шум вокруг постоянной цены
+    :param n: int - количество тиков
+    :param rng: np.random.Generator - генератор случайных чисел
+    :param sigma: float - стандартное отклонение шума
+    :return: np.ndarray - цены
+    """
+    return 100 + rng.normal(0, sigma, n)
+
+
+GENERATORS = {'gbm': gbm, 'regime': regime, 'flat': flat}
+
+
+def make_ticks(kind, n, seed):
+    """
+    Функция генерации синтетических тиков с шагом цены 0.01
+    :param kind: str - тип ряда (gbm, regime, flat)
+    :param n: int - количество тиков
+    :param seed: int - зерно генератора
+    :return: Ticks - дата и время, цены, логарифм цен
+    """
+    rng = np.random.default_rng(seed)
+    price = np.maximum(np.round(GENERATORS[kind](n, rng), 2), 0.01)
+
+    # один тик в секунду, начиная с 2020.01.01 00.00.00
+    second = np.arange(n, dtype=np.int64)
+    day = np.datetime64('2020-01-01') + second // 86400
+    month = day.astype('datetime64[M]')
+    date = ((day.astype('datetime64[Y]').astype(np.int64) + 1970) * 10**4
+            + (month.astype(np.int64) % 12 + 1) * 100
+            + (day - month).astype(np.int64) + 1)
+    second %= 86400
+    timestamp = (date * 10**6 + second // 3600 * 10**4
+                 + second // 60 % 60 * 100 + second % 60)
+
+    return Ticks(timestamp, price, np.log(price))
+
+
+def get_profit(log_price, X_min, X_max):
+    """
+    Функция, которая вычисляет прибыль стратегии в логарифмах цен
+    :param log_price: np.ndarray - логарифм цен
+    :param X_min: list - точки покупки
+    :param X_max: list - точки продажи
+    :return: float - прибыль
+    """
+    return float(np.sum(log_price[X_max] - log_price[X_min]))
+
+
+def run_case(kind, n, seed, k, N, reference_limit, memory=True):
+    """
+    Функция, которая прогоняет все этапы стратегии на одном ряде
+    :param kind: str - тип ряда
+    :param n: int - количество тиков
+    :param seed: int - зерно генератора
+    :param k: int - количество транзакций
+    :param N: int - размер блока для поиска максимумов и минимумов
+    :param reference_limit: int - наибольший ряд, для которого
+    считается точный оптимум по всем тикам
+    :param memory: bool - замерять ли память
+    :return: dict - результаты замеров
+    """
+    ticks = make_ticks(kind, n, seed)
+    log_price = ticks.log_price
+    result = {'series': kind, 'ticks': n, 'seed': seed, 'k': k, 'block': N,
+              'stages': {}}
+
+    def add_stage(name, func, *args, **kwargs):
+        value, seconds, peak = measure(func, *args, memory=memory, **kwargs)
+        result['stages'][name] = {'seconds': seconds, 'peak_bytes': peak}
+        return value
+
+    x_min, x_max = add_stage('extrema', find_extrema, log_price, N)
+    X_min, X_max = add_stage('optimize', get_best_transactions,
+                             log_price, x_min, x_max, k)
+    add_stage('curve', get_profit_curve, log_price, x_min, x_max, K=k)
+    with open(os.devnull, 'wb') as file:
+        add_stage('report', write_report, file, ticks, X_min, X_max, 10**4,
+                  summary=True)
+
+    result['trades'] = len(X_min)
+    result['profit'] = get_profit(log_price, X_min, X_max)
+
+    if n <= reference_limit:
+        everything = np.arange(n)
+        X_min, X_max = add_stage('reference', get_best_transactions,
+                                 log_price, everything, everything[:0], k)
+        result['exact_profit'] = get_profit(log_price, X_min, X_max)
+        result['profit_gap'] = result['exact_profit'] - result['profit']
+        result['efficiency'] = (float(np.expm1(result['profit'])
+                                      / np.expm1(result['exact_profit']))
+                                if result['exact_profit'] > 0 else 1.0)
+    return result
+
+
+def main():
+    """Функция запуска замеров"""
+    parser = argparse.ArgumentParser(
+        description='Замеры скорости и качества стратегии на синтетических '
+                    'данных'
+    )
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='количества тиков через запятую (до 10^8)')
+    parser.add_argument('--series', default='gbm,regime,flat',
+                        help='типы рядов через запятую: '
+                             + ', '.join(GENERATORS))
+    parser.add_argument('--seed', type=int, default=0,
+                        help='зерно генератора')
+    parser.add_argument('-k', type=int, default=5,
+                        help='количество транзакций')
+    parser.add_argument('--block', type=int, default=4000,
+                        help='размер блока для поиска максимумов и минимумов')
+    parser.add_argument('--reference-limit', type=float, default=10**6,
+                        help='наибольший ряд, для которого считается точный '
+                             'оптимум по всем тикам')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='не замерять пиковую память')
+    parser.add_argument('-o', '--output', default='benchmark.json',
+                        help='файл с результатами (.json)')
+    args = parser.parse_args()
+
+    sizes = [int(float(val)) for val in args.sizes.split(',')]
+    series = args.series.split(',')
+    for kind in series:
+        if kind not in GENERATORS:
+            parser.error(f'неизвестный тип ряда: {kind}')
+
+    results = []
+    for kind in series:
+        for n in sizes:
+            result = run_case(kind, n, args.seed, args.k, args.block,
+                              args.reference_limit, not args.no_memory)
+            results.append(result)
+
+            stages = ', '.join(f"{name} {val['seconds']:.3f}s"
+                               for name, val in result['stages'].items())
+            print(f'{kind} n={n}: {stages}; '
+                  f"efficiency={result.get('efficiency', '-')}")
+
+    report = {
+        'revision': get_revision(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,37 +1,306 @@
 import os
-from collections import Counter
-from time import sleep
-from random import shuffle, randint
-from copy import deepcopy
+import sys
 import pickle
+from math import log2
+from time import sleep, perf_counter, strftime
+from random import shuffle, randint, Random
+from itertools import permutations, product
+from collections import OrderedDict
 
 
 class Grid:
-    """Класс, описывающий сетку игрового поля"""
-    def __init__(self, start_grid=None, num_drop_cells=46):
+    """
+    Класс, описывающий сетку игрового поля размера n^2 x n^2
+    (4х4, 9х9, 16х16, 25х25), состоящую из квадратов n x n.
+    Значения клеток хранятся в bytearray (слева направо сверху вниз),
+    исходные клетки - в битовом множестве. Для строк, столбцов и квадратов
+    поддерживаются маски занятых цифр и счетчики цифр, поэтому ход
+    и все поле проверяются за O(1)
+    """
+    __slots__ = ('_box', '_size', '_values', '_givens', '_rows', '_cols',
+                 '_boxes', '_counts', '_filled', '_conflicts',
+                 '_set_delay', '_delay', '_colorize')
+
+    def __init__(self, start_grid=None, num_drop_cells=46, box_size=3):
         """
         :param start_grid: list - готовое игровое поле
         :num_drop_cells: количество клеток, которые будут пустыми
+        :param box_size: int - размер квадрата n (для готового поля
+        определяется по его размеру)
         """
+        if start_grid is not None:
+            box_size = int(round(len(start_grid) ** 0.5))
+            if (box_size ** 2 != len(start_grid)
+                    or any(len(row) != len(start_grid) for row in start_grid)):
+                raise ValueError('Размер поля должен быть n^2 x n^2!')
+        self._box = box_size
+        self._size = box_size ** 2
+
         if start_grid is None:
-            self._playing_field = [
-                [(x + 3 * t + t // 3) % 9 + 1 for x in range(9)]
-                for t in range(9)
+            field = [
+                [(x + self._box * t + t // self._box) % self._size + 1
+                 for x in range(self._size)]
+                for t in range(self._size)
             ]
-            self._shuffle_grid()
-            self._drop_cells(num_drop_cells)
-        else:
-            self._playing_field = deepcopy(start_grid)
+            field = self._shuffle_grid(field)
+            start_grid = self._drop_cells(field, num_drop_cells)
+        self._load(start_grid)
+
         self._set_delay = True
         self._delay = 10**-2
-        self._grid_mask = [
-            [x != 0 for x in row] for row in self._playing_field
-            ]
         self._colorize = True
 
+    def _load(self, field, givens=None):
+        """
+        Функция, которая заполняет сетку и строит маски и счетчики
+        :param field: list - игровое поле
+        :param givens: int - битовое множество исходных клеток
+        (по умолчанию - все заполненные клетки)
+        """
+        size = self._size
+        self._values = bytearray(size * size)
+        self._rows = [0] * size
+        self._cols = [0] * size
+        self._boxes = [0] * size
+        self._counts = bytearray(3 * size * size)
+        self._filled = 0
+        self._conflicts = 0
+
+        for i in range(size):
+            for j in range(size):
+                if not 0 <= field[i][j] <= size:
+                    raise ValueError(f'Некорректное значение клетки: '
+                                     f'{field[i][j]}')
+                if field[i][j]:
+                    self._add(i * size + j, field[i][j])
+
+        if givens is None:
+            givens = 0
+            for k in range(size * size):
+                if self._values[k]:
+                    givens |= 1 << k
+        self._givens = givens
+
+    def _add(self, k, number):
+        """
+        Функция, которая ставит цифру в пустую клетку
+        и обновляет маски и счетчики
+        :param k: номер клетки (слева направо сверху вниз)
+        :param number: цифра от 1 до n^2
+        """
+        size = self._size
+        row, col = divmod(k, size)
+        sq = self._get_num_of_square(row, col)
+        for unit in (row, size + col, 2 * size + sq):
+            c = unit * size + number - 1
+            self._counts[c] += 1
+            if self._counts[c] == 2:
+                self._conflicts += 1
+
+        bit = 1 << (number - 1)
+        self._rows[row] |= bit
+        self._cols[col] |= bit
+        self._boxes[sq] |= bit
+        self._values[k] = number
+        self._filled += 1
+
+    def _remove(self, k):
+        """
+        Функция, которая очищает клетку и обновляет маски и счетчики
+        :param k: номер клетки (слева направо сверху вниз)
+        """
+        number = self._values[k]
+        if not number:
+            return
+
+        size = self._size
+        row, col = divmod(k, size)
+        sq = self._get_num_of_square(row, col)
+        masks = (self._rows, self._cols, self._boxes)
+        for t, (unit, val) in enumerate(((row, row), (size + col, col),
+                                         (2 * size + sq, sq))):
+            c = unit * size + number - 1
+            self._counts[c] -= 1
+            if self._counts[c] == 1:
+                self._conflicts -= 1
+            elif self._counts[c] == 0:
+                masks[t][val] &= ~(1 << (number - 1))
+        self._values[k] = 0
+        self._filled -= 1
+
     @property
     def grid(self):
-        return self._playing_field
+        """
+        Игровое поле в виде кортежа строк (только для чтения: запись
+        grid.grid[i][j] = v бросает TypeError). Менять клетки нужно
+        через fill_cell (по правилам) или set_cell
+        """
+        size = self._size
+        return tuple(tuple(self._values[i * size: (i + 1) * size])
+                     for i in range(size))
+
+    @property
+    def values(self):
+        """Значения клеток (слева направо сверху вниз) в виде bytes"""
+        return bytes(self._values)
+
+    @property
+    def givens(self):
+        """Битовое множество исходных клеток"""
+        return self._givens
+
+    @classmethod
+    def from_values(cls, values, givens=None):
+        """
+        Функция создания сетки по значениям клеток
+        :param values: bytes - значения клеток (слева направо сверху вниз)
+        :param givens: int - битовое множество исходных клеток
+        (по умолчанию - все заполненные клетки)
+        :return: Grid - сетка игрового поля
+        """
+        size = int(round(len(values) ** 0.5))
+        box = int(round(size ** 0.5))
+        if box ** 4 != len(values):
+            raise ValueError('Размер поля должен быть n^2 x n^2!')
+
+        grid = cls.__new__(cls)
+        grid._box = box
+        grid._size = size
+        grid._load([list(values[i * size: (i + 1) * size])
+                    for i in range(size)], givens)
+        grid._set_delay = True
+        grid._delay = 10**-2
+        grid._colorize = True
+        return grid
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def box_size(self):
+        return self._box
+
+    def get_cell(self, i, j):
+        """
+        Функция, которая возвращает значение клетки
+        :param i: номер строки
+        :param j: номер столбца
+        :return: int - число в клетке (0 - пустая клетка)
+        """
+        return self._values[i * self._size + j]
+
+    def get_candidates(self, i, j):
+        """
+        Функция, которая возвращает числа, которые можно поставить
+        в пустую клетку (по маскам строки, столбца и квадрата, за O(1))
+        :param i: номер строки
+        :param j: номер столбца
+        :return: list - числа по возрастанию (для заполненной клетки - [])
+        """
+        if self._values[i * self._size + j]:
+            return []
+        used = (self._rows[i] | self._cols[j]
+                | self._boxes[self._get_num_of_square(i, j)])
+        return [d + 1 for d in range(self._size) if not used >> d & 1]
+
+    def is_given(self, i, j):
+        """
+        Функция, которая проверяет, была ли клетка заполнена изначально
+        :param i: номер строки
+        :param j: номер столбца
+        :return: bool - True для исходной клетки
+        """
+        return bool(self._givens >> (i * self._size + j) & 1)
+
+    def set_cell(self, i, j, number):
+        """
+        Функция, которая записывает значение в клетку без проверки
+        правил (для решателей)
+        :param i: номер строки
+        :param j: номер столбца
+        :param number: число от 1 до n^2 или 0, чтобы очистить клетку
+        """
+        k = i * self._size + j
+        self._remove(k)
+        if number:
+            self._add(k, number)
+
+    def clear_cell(self, i, j):
+        """
+        Функция, которая очищает клетку
+        :param i: номер строки
+        :param j: номер столбца
+        """
+        self._remove(i * self._size + j)
+
+    def copy(self):
+        """
+        Функция копирования сетки: значения и счетчики копируются
+        одним копированием буфера, маски - копированием списков
+        :return: Grid - копия сетки
+        """
+        grid = Grid.__new__(Grid)
+        for name in Grid.__slots__:
+            setattr(grid, name, getattr(self, name))
+        grid._values = self._values[:]
+        grid._counts = self._counts[:]
+        grid._rows = self._rows[:]
+        grid._cols = self._cols[:]
+        grid._boxes = self._boxes[:]
+        return grid
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __getstate__(self):
+        """
+        Состояние для pickle: значения клеток, исходные клетки
+        и настройки вывода (маски и счетчики строятся заново)
+        :return: dict - состояние сетки
+        """
+        return {
+            'box': self._box,
+            'values': bytes(self._values),
+            'givens': self._givens,
+            'set_delay': self._set_delay,
+            'delay': self._delay,
+            'colorize': self._colorize
+        }
+
+    def __setstate__(self, state):
+        """
+        Восстановление поля из pickle. Поддерживаются и сохранения
+        старых версий (поле - список строк и маска исходных клеток)
+        :param state: dict - состояние сетки
+        """
+        if 'values' in state:
+            self._box = state['box']
+            self._size = self._box ** 2
+            size = self._size
+            values = state['values']
+            field = [list(values[i * size: (i + 1) * size])
+                     for i in range(size)]
+            givens = state['givens']
+            self._set_delay = state['set_delay']
+            self._delay = state['delay']
+            self._colorize = state['colorize']
+        else:
+            field = state['_playing_field']
+            self._size = len(field)
+            self._box = int(round(self._size ** 0.5))
+            givens = 0
+            for i, row in enumerate(state['_grid_mask']):
+                for j, val in enumerate(row):
+                    if val:
+                        givens |= 1 << (i * self._size + j)
+            self._set_delay = state.get('_set_delay', True)
+            self._delay = state.get('_delay', 10**-2)
+            self._colorize = state.get('_colorize', True)
+        self._load(field, givens)
 
     @property
     def colorize(self):
@@ -44,66 +313,85 @@ class Grid:
         else:
             raise TypeError
 
-    def _transpose(self):
-        """Функция транспонирования сетки"""
-        self._playing_field = [*map(list, zip(*self._playing_field))]
+    @staticmethod
+    def _transpose(field):
+        """
+        Функция транспонирования сетки
+        :param field: list - игровое поле
+        :return: list - новое игровое поле
+        """
+        return [*map(list, zip(*field))]
 
-    def _swap_rows_area(self):
+    def _swap_rows_area(self, field):
         """
-        Функция перестановка двух зон, состоящих из 3 строк.
-        В сетке 3 таких зоны: 1-3, 4-6, 7-9 строки включительно.
+        Функция перестановки зон, состоящих из n строк.
+        В сетке 9х9 3 таких зоны: 1-3, 4-6, 7-9 строки включительно.
+        :param field: list - игровое поле
+        :return: list - новое игровое поле
         """
-        indx = [*range(0, 3)]
-        array_slices = [
-            self._playing_field[3 * i: 3 * (i + 1)] for i in range(3)
-        ]
-        self._playing_field = []
+        box = self._box
+        indx = [*range(0, box)]
+        array_slices = [field[box * i: box * (i + 1)] for i in range(box)]
+        field = []
 
         shuffle(indx)
-        for i in range(3):
-            self._playing_field += array_slices[indx[i]]
+        for i in range(box):
+            field += array_slices[indx[i]]
+        return field
 
-    def _swap_cols_area(self):
+    def _swap_cols_area(self, field):
         """
-        Функция перестановки двух зон, состоящих из 3 столбцоа.
-        В сетке 3 таких зоны: 1-3, 4-6, 7-9 столбцы включительно.
+        Функция перестановки зон, состоящих из n столбцов.
+        В сетке 9х9 3 таких зоны: 1-3, 4-6, 7-9 столбцы включительно.
+        :param field: list - игровое поле
+        :return: list - новое игровое поле
         """
-        self._transpose()
-        self._swap_rows_area()
-        self._transpose()
+        field = Grid._transpose(field)
+        field = self._swap_rows_area(field)
+        return Grid._transpose(field)
 
-    def _swap_rows(self):
-        """Функция перестановки 2 случайных строк"""
-        area = randint(0, 2)
-        indx = [*range(3)]
+    def _swap_rows(self, field):
+        """
+        Функция перестановки строк внутри случайной зоны
+        :param field: list - игровое поле
+        :return: list - новое игровое поле
+        """
+        box = self._box
+        area = randint(0, box - 1)
+        indx = [*range(box)]
         shuffle(indx)
 
-        array_slices = [
-            self._playing_field[3 * i: 3 * (i + 1)] for i in range(3)
-        ]
+        array_slices = [field[box * i: box * (i + 1)] for i in range(box)]
 
         arr = []
-        for i in range(3):
+        for i in range(box):
             arr += [array_slices[area][indx[i]]]
 
         array_slices[area] = arr
-        self._playing_field = []
-        for i in range(3):
-            self._playing_field += array_slices[i]
+        field = []
+        for i in range(box):
+            field += array_slices[i]
+        return field
 
-    def _swap_cols(self):
-        """Функция перестановки 2 случайных столбцов"""
-        self._transpose()
-        self._swap_rows()
-        self._transpose()
+    def _swap_cols(self, field):
+        """
+        Функция перестановки столбцов внутри случайной зоны
+        :param field: list - игровое поле
+        :return: list - новое игровое поле
+        """
+        field = Grid._transpose(field)
+        field = self._swap_rows(field)
+        return Grid._transpose(field)
 
-    def _shuffle_grid(self, iter_num=15):
+    def _shuffle_grid(self, field, iter_num=15):
         """
         Функция для случайного перемешивания строк, стобцов и зон
+        :param field: list - игровое поле
         :param iter_num: количество итераций перемешивания
+        :return: list - новое игровое поле
         """
         func = [
-            self._transpose,
+            Grid._transpose,
             self._swap_rows,
             self._swap_rows_area,
             self._swap_cols,
@@ -111,32 +399,37 @@ class Grid:
         ]
 
         for i in range(iter_num):
-            func[randint(0, len(func) - 1)]()
+            field = func[randint(0, len(func) - 1)](field)
+        return field
 
-    def _drop_cells(self, n):
+    def _drop_cells(self, field, n):
         """
-        Функция для удаления клеток
+        Функция для удаления клеток. Клетки удаляются так, чтобы решение
+        оставалось единственным; если столько клеток так удалить нельзя,
+        недостающие удаляются случайно (решение остается, но не одно)
+        :param field: list - заполненное игровое поле
         :param n: количество клеток, которые будут удалены
+        :return: list - новое игровое поле
         """
-        if (n > 66):
+        # как и в сетке 9х9 (не больше 66 из 81),
+        # должно остаться не меньше 19% заполненных клеток
+        if (n > self._size ** 2 * 66 // 81):
             raise ValueError('Слишком мало заполненных клеток!')
         if (n < 1):
             raise ValueError('Все клетки заполнены!')
-        solver = SudokuSolver()
-
-        num_drop_cells = 0
-        while (num_drop_cells < n):
-            i, j = randint(0, 8), randint(0, 8)
-            if (self._playing_field[i][j] == 0):
-                continue
 
-            t = self._playing_field[i][j]
-            self._playing_field[i][j] = 0
-
-            if not solver.get_solution(Grid(self._playing_field)):
-                self._playing_field[i][j] = t
-            else:
-                num_drop_cells += 1
+        # зерно берется из random, поэтому random.seed делает
+        # удаление клеток воспроизводимым
+        generator = SudokuGenerator(self._box, randint(0, 2**32 - 1))
+        field = generator.drop_cells(field, n)
+        cells = [
+            (i, j) for i in range(self._size) for j in range(self._size)
+            if field[i][j]
+        ]
+        shuffle(cells)
+        for i, j in cells[:n - (self._size ** 2 - len(cells))]:
+            field[i][j] = 0
+        return field
 
     @property
     def delay(self):
@@ -173,174 +466,670 @@ class Grid:
         "Функция очистки консоли"
         os.system('cls' if os.name == 'nt' else 'clear')
 
-    def show(self, clr_screen=True):
+    def _get_cell_text(self, i, j):
         """
-        Функция, которая выводит сетку в консоль
-        :param clr_screen: bool - показывает, необходимо ли очищать экран
+        Функция, которая возвращает текст ячейки (без рамки)
+        :param i: номер строки
+        :param j: номер столбца
+        :return: str - значение, выровненное по ширине ячейки
         """
-        if self._set_delay:
-            sleep(self._delay)
-
-        if clr_screen:
-            Grid._cls()
+        width = len(str(self._size))
+        val = self._values[i * self._size + j]
+        # когда элемент в ячейке отсутствует
+        if (val == 0):
+            return ' ' * width
+        if (self._colorize and self.is_given(i, j)):
+            return f'\033[31m{val:>{width}}\033[0m'
+        return f'{val:>{width}}'
+
+    def _get_cell_position(self, i, j):
+        """
+        Функция, которая вычисляет позицию значения ячейки на экране
+        относительно левого верхнего угла сетки
+        :param i: номер строки
+        :param j: номер столбца
+        :return: tuple - номер строки и номер символа (с нуля)
+        """
+        width = len(str(self._size))
+        return 2 * i + 1, 2 + j // self._box + j * (width + 3) + 1
 
-        for i in range(len(self._playing_field)):
-            if (i % 3 == 0):
-                print('=' * 41)
+    def _get_lines(self):
+        """
+        Функция, которая строит строки сетки для вывода
+        :return: list - строки сетки
+        """
+        # ширина ячейки по самому длинному числу (для 9х9 - 41 символ)
+        width = len(str(self._size))
+        line = 2 + self._box + self._size * (width + 3)
+
+        lines = []
+        for i in range(self._size):
+            if (i % self._box == 0):
+                lines.append('=' * line)
             else:
-                print('-' * 41)
+                lines.append('-' * line)
 
             st = '|'
-            for j in range(9):
-                if (j % 3 == 0):
+            for j in range(self._size):
+                if (j % self._box == 0):
                     st += '|'
-
-                # когда элемент в ячейке отсутствует
-                if (self._playing_field[i][j] == 0):
-                    st += '   |'
-                else:
-                    if (self._colorize and self._grid_mask[i][j]):
-                        st += f' \033[31m{self._playing_field[i][j]}\033[0m |'
-                    else:
-                        st += f' {self._playing_field[i][j]} |'
+                st += f' {self._get_cell_text(i, j)} |'
             st += '|'
+            lines.append(st)
+        lines.append('=' * line)
+        return lines
 
-            print(st)
-        print('=' * 41)
-
-    @staticmethod
-    def _check(counter):
+    def show(self, clr_screen=True):
         """
-        Функция, которая проверяет условие:
-        каждое число должно появиться не более одного раза
-        :param counter: Counter - счетчик поличества появлений каждой цифры
-        :return: True - если условие выполняется, иначе False
+        Функция, которая выводит сетку в консоль
+        :param clr_screen: bool - показывает, необходимо ли очищать экран
         """
-        if not all([counter[key] == 1 for key in counter.keys()]):
-            return False
-        return True
+        if self._set_delay:
+            sleep(self._delay)
 
-    @staticmethod
-    def _get_num_of_square(i, j):
+        if clr_screen:
+            Grid._cls()
+
+        print('\n'.join(self._get_lines()))
+
+    def _get_num_of_square(self, i, j):
         """"
-        Функция, которая вычисляет номер квадрата 3х3
-        (слева направо сверху вниз 9 квадратов 3х3)
+        Функция, которая вычисляет номер квадрата n x n
+        (слева направо сверху вниз, для 9х9 - 9 квадратов 3х3)
         по значению строки и столбца
         :param i: номер строки
         :param j: номер столбца
         """
-        return (i // 3) * 3 + j // 3
+        return (i // self._box) * self._box + j // self._box
 
-    def _check_row(self, i):
+    def check_grid(self):
+        """
+        Функция, которая проверяет все правила игры:
+        1. В каждой строке каждая цифра встречается не более одного раза
+        2. В каждом столбце каждая цифра встречается не более одного раза
+        3. В каждом квадрате каждая цифра встречается не более одного раза
+           (слева направо сверху вниз n^2 квадратов n x n)
+        4. Отсутствуют незаполненные клетки (отсутствуют нули в сетке)
+        Повторы цифр и заполненные клетки считаются при каждом ходе,
+        поэтому проверка выполняется за O(1)
         """
-        Функция, которая проверяет условие:
-        в строке каждая цифра может появляться не более одного раза
+        return self._conflicts == 0 and self._filled == self._size ** 2
+
+    def fill_cell(self, i, j, number):
+        """
+        Функция, которая заполняет ячейку,
+        если значение удовлетворяет всем правилам игры
         :param i: номер строки
-        :return: bool - True, если условие выполняется, иначе False
+        :param j: номер столбца
+        :param number: значение, которым может быть
+        заполнена ячейка (число от 1 до n^2, 0 - очистить ячейку)
+        :return: bool - True, если number соответствовало правилам
+        и было присовено ячейке, иначе False
         """
-        counter = Counter(self._playing_field[i])
-        del counter[0]
-        if not Grid._check(counter):
+        if self.is_given(i, j) or not 0 <= number <= self._size:
             return False
+
+        k = i * self._size + j
+        t = self._values[k]
+        self._remove(k)
+        if number:
+            bit = 1 << (number - 1)
+            sq = self._get_num_of_square(i, j)
+            if (self._rows[i] | self._cols[j] | self._boxes[sq]) & bit:
+                if t:
+                    self._add(k, t)
+                return False
+            self._add(k, number)
         return True
 
-    def _check_col(self, j):
+
+class GridRenderer:
+    """
+    Класс для вывода сетки в терминал по кадрам. Первый кадр выводится
+    целиком, в следующих перерисовываются только изменившиеся ячейки:
+    курсор переводится escape-последовательностями ANSI, кадр
+    записывается одной операцией. Кадры выводятся не чаще, чем раз
+    в интервал, промежуточные шаги пропускаются
+    """
+    def __init__(self, grid, interval=None, stream=None):
         """
-        Функция, которая проверяет условие:
-        в столбце каждая цифра может появляться не более одного раза
-        :param j: номер строки
-        :return: bool - True, если условие выполняется, иначе False
+        :param grid: Grid - сетка игрового поля
+        :param interval: float - минимальный интервал между кадрами в
+        секундах (по умолчанию - задержка сетки, если она включена,
+        иначе 1/60)
+        :param stream: поток вывода (по умолчанию - sys.stdout)
         """
-        counter = Counter([
-            val for val in map(
-                lambda x: x[j],
-                self._playing_field
-                )
-            ])
-        del counter[0]
-        if not Grid._check(counter):
+        if interval is None:
+            interval = grid.delay if grid.set_delay else 1 / 60
+        self._grid = grid
+        self._interval = interval
+        self._stream = stream or sys.stdout
+        self._shown = None
+        self._last = None
+        self._status = ''
+        self._pending = False
+
+    def draw(self, status='', force=False):
+        """
+        Функция вывода кадра
+        :param status: str - строка состояния под сеткой
+        :param force: bool - вывести кадр, даже если интервал не прошел
+        :return: bool - True, если кадр выведен, иначе шаг пропущен
+        """
+        self._status = status
+        now = perf_counter()
+        if (not force and self._last is not None
+                and now - self._last < self._interval):
+            self._pending = True
             return False
-        return True
 
-    def _check_square(self, num):
-        """
-        Функция, которая проверяет условие:
-        в квадрате 3х3 каждая цифра может появляться не более одного раза
-        :param num: номер квадрата (слева направо сверху вниз 9 квадратов 3х3)
-        :return: bool - True, если условие выполняется, иначе False
-        """
-        val = (3 * (num + 1))
-        ind_right = val % 9 if val % 9 != 0 else val
-        counter = Counter(sum([x for x in map(
-            lambda x: x[(3 * num) % 9: ind_right],
-            self._playing_field[3 * (num // 3):3 + 3 * (num // 3)]
-        )], []))
-        del counter[0]
-        if not Grid._check(counter):
-            return False
+        grid = self._grid
+        values = grid.grid
+        parts = []
+        if self._shown is None:
+            # очистка экрана и курсор в левый верхний угол
+            parts.append('\033[2J\033[H')
+            parts.append('\n'.join(grid._get_lines()))
+        else:
+            for i in range(grid.size):
+                for j in range(grid.size):
+                    if values[i][j] != self._shown[i][j]:
+                        row, col = grid._get_cell_position(i, j)
+                        parts.append(f'\033[{row + 1};{col + 1}H'
+                                     + grid._get_cell_text(i, j))
+
+        # строка состояния под сеткой (старая стирается до конца строки)
+        parts.append(f'\033[{2 * grid.size + 3};1H\033[K{status}\n')
+        self._stream.write(''.join(parts))
+        self._stream.flush()
+
+        self._shown = values
+        self._last = now
+        self._pending = False
         return True
 
-    def check_grid(self):
+    def close(self):
+        """Функция вывода последнего пропущенного кадра"""
+        if self._pending or self._shown is None:
+            self.draw(self._status, force=True)
+
+
+class SolverStats:
+    """
+    Класс счетчиков решателя: узлы перебора (корень и каждая
+    пробная цифра), откаты после противоречий, цифры, поставленные
+    распространением ограничений (единственный кандидат в клетке
+    и единственное место в строке/столбце/квадрате), наибольшая
+    глубина перебора и время. Счетчики - целые числа, которые
+    увеличиваются на месте, поэтому их можно не выключать
+    """
+    __slots__ = ('nodes', 'backtracks', 'naked_singles', 'hidden_singles',
+                 'max_depth', 'seconds')
+
+    def __init__(self):
+        self.nodes = 0
+        self.backtracks = 0
+        self.naked_singles = 0
+        self.hidden_singles = 0
+        self.max_depth = 0
+        self.seconds = 0.0
+
+    @property
+    def difficulty(self):
         """
-        Функция, которая проверяет все правила игры:
-        1. В каждой строке каждая цифра встречается не более одного раза
-        2. В каждом столбце каждая цифра встречается не более одного раза
-        3. В каждом квадрате каждая цифра встречается не более одного раза
-           (слева направо сверху вниз 9 квадратов 3х3)
-        4. Отсутствуют незаполненные клетки (отсутствуют нули в сетке)
+        Оценка сложности: 1 + доля цифр, для которых понадобилось
+        единственное место в строке/столбце/квадрате, + 2 * log2(узлов).
+        Без перебора оценка от 1 до 2, каждое удвоение дерева
+        перебора добавляет 2. Оценка не зависит от обозначения цифр,
+        только если дерево перебора пройдено целиком (count_solutions
+        с limit=2 для головоломки с единственным решением): до первого
+        решения число узлов зависит от порядка пробных цифр
         """
-        set_of_num = set()
+        placed = self.naked_singles + self.hidden_singles
+        if self.nodes == 0:
+            return 0.0
+        share = self.hidden_singles / placed if placed else 0.0
+        return 1 + share + 2 * log2(self.nodes)
 
-        for i in range(9):
-            # проверка строк
-            if not self._check_row(i):
-                return False
+    def as_dict(self):
+        """
+        Функция, которая возвращает счетчики в виде словаря
+        :return: dict - счетчики и оценка сложности
+        """
+        result = {name: getattr(self, name) for name in self.__slots__}
+        result['difficulty'] = self.difficulty
+        return result
 
-            # проверка столбцов
-            if not self._check_col(i):
-                return False
+    def __repr__(self):
+        return 'SolverStats({})'.format(', '.join(
+            f'{name}={val!r}' for name, val in self.as_dict().items()
+        ))
+
+
+# диапазоны оценки сложности (SolverStats.difficulty по всему дереву
+# перебора, см. rate_puzzle): easy и medium решаются без перебора
+# (оценка от 1 до 2 включительно), hard - перебор до 8 узлов
+# (наименьшая оценка с перебором - 3 узла, 1 + 2 * log2(3) > 4),
+# expert - больше
+DIFFICULTY_BANDS = {
+    'easy': (0, 1.5),
+    'medium': (1.5, 3),
+    'hard': (3, 8),
+    'expert': (8, float('inf'))
+}
+
+
+class SudokuSolver:
+    """
+    Класс для поиска решения Судоку компьютером. Для каждой строки,
+    столбца и квадрата хранится битовая маска использованных цифр,
+    поэтому кандидаты клетки вычисляются за O(1). Перед каждым ветвлением
+    выполняется распространение ограничений: единственный кандидат
+    в клетке и единственное место для цифры в строке, столбце или
+    квадрате. Ветвление - по клетке с наименьшим числом кандидатов.
+    Перебор идет без рекурсии, со своим стеком, и отдает ходы по одному
+    (iter_steps), поэтому глубина перебора не ограничена стеком вызовов
+    """
+    def __init__(self):
+        self._print_steps = False
+        self._events = None
+        self._stats = SolverStats()
+
+    def _set_print_steps(self, val):
+        if (type(val) == bool):
+            self._print_steps = val
+        else:
+            raise TypeError
+
+    print_steps = property(fset=_set_print_steps)
+    del _set_print_steps
+
+    @property
+    def stats(self):
+        """SolverStats - счетчики последнего решения или подсчета"""
+        return self._stats
+
+    # клетки -> (строка, столбец, квадрат) и списки клеток строк,
+    # столбцов и квадратов: размер поля -> (cell_units, units)
+    _structures = {}
 
-            # проверка квадратов 3х3
-            if not self._check_square(i):
+    @classmethod
+    def _get_structure(cls, size):
+        """
+        Функция, которая строит (или берет готовые) списки клеток
+        для поля заданного размера
+        :param size: int - размер поля n^2
+        :return: tuple - cell_units, units
+        """
+        if size not in cls._structures:
+            box = int(round(size ** 0.5))
+            cell_units = tuple(
+                (i // size, i % size,
+                 (i // size) // box * box + (i % size) // box)
+                for i in range(size * size)
+            )
+            units = tuple(
+                [tuple(i * size + j for j in range(size))
+                 for i in range(size)]
+                + [tuple(i * size + j for i in range(size))
+                   for j in range(size)]
+                + [tuple((b // box * box + i // box) * size
+                         + b % box * box + i % box for i in range(size))
+                   for b in range(size)]
+            )
+            cls._structures[size] = (cell_units, units)
+        return cls._structures[size]
+
+    def _init_state(self, field, events=False):
+        """
+        Функция, которая строит битовые маски по полю. Поле не
+        изменяется: решатель работает со своей копией значений
+        :param field: list - игровое поле
+        :param events: bool - записывать ли ходы для iter_steps
+        (False - только подсчет)
+        :return: bool - False, если исходные цифры противоречат правилам
+        """
+        size = len(field)
+        self._events = [] if events else None
+        self._stats = SolverStats()
+        self._size = size
+        self._all = (1 << size) - 1
+        self._cell_units, self._units = self._get_structure(size)
+
+        self._values = [val for row in field for val in row]
+        self._rows = [0] * size
+        self._cols = [0] * size
+        self._boxes = [0] * size
+
+        for i, val in enumerate(self._values):
+            if val == 0:
+                continue
+            bit = 1 << (val - 1)
+            row, col, sq = self._cell_units[i]
+            if (self._rows[row] | self._cols[col] | self._boxes[sq]) & bit:
                 return False
+            self._rows[row] |= bit
+            self._cols[col] |= bit
+            self._boxes[sq] |= bit
+        return True
 
-            set_of_num |= set(self._playing_field[i])
+    def _candidates(self, i):
+        """
+        Функция, которая вычисляет кандидатов клетки
+        :param i: номер клетки (слева направо сверху вниз)
+        :return: int - битовая маска цифр, которые можно поставить в клетку
+        """
+        row, col, sq = self._cell_units[i]
+        return self._all & ~(self._rows[row] | self._cols[col]
+                             | self._boxes[sq])
 
-        # проверка на наличие нулей
-        if 0 in set_of_num:
-            return False
+    def _place(self, i, bit, trail):
+        """
+        Функция, которая ставит цифру в клетку
+        :param i: номер клетки
+        :param bit: int - цифра в виде бита
+        :param trail: list - журнал поставленных клеток для отката
+        """
+        row, col, sq = self._cell_units[i]
+        number = bit.bit_length()
+        self._values[i] = number
+        self._rows[row] |= bit
+        self._cols[col] |= bit
+        self._boxes[sq] |= bit
+        trail.append(i)
+        if self._events is not None:
+            self._events.append((row, col, number, 'place'))
+
+    def _undo(self, trail, length=0):
+        """
+        Функция отката поставленных клеток
+        :param trail: list - журнал поставленных клеток
+        :param length: int - длина журнала, до которой нужно откатиться
+        """
+        values, rows, cols, boxes = (self._values, self._rows,
+                                     self._cols, self._boxes)
+        while len(trail) > length:
+            i = trail.pop()
+            row, col, sq = self._cell_units[i]
+            if self._events is not None:
+                self._events.append((row, col, values[i], 'undo'))
+            bit = ~(1 << (values[i] - 1))
+            values[i] = 0
+            rows[row] &= bit
+            cols[col] &= bit
+            boxes[sq] &= bit
+
+    def _propagate(self, trail):
+        """
+        Функция распространения ограничений
+        :param trail: list - журнал поставленных клеток
+        :return: bool - False, если найдено противоречие
+        """
+        # маски и значения - в локальных переменных: функция вызывается
+        # в каждом узле перебора и занимает почти все время решения
+        values, rows, cols, boxes = (self._values, self._rows,
+                                     self._cols, self._boxes)
+        cell_units, full = self._cell_units, self._all
+
+        changed = True
+        while changed:
+            changed = False
+
+            # в клетке остался единственный кандидат
+            for i in range(len(values)):
+                if values[i]:
+                    continue
+                row, col, sq = cell_units[i]
+                cand = full & ~(rows[row] | cols[col] | boxes[sq])
+                if cand == 0:
+                    return False
+                if cand & (cand - 1) == 0:
+                    self._place(i, cand, trail)
+                    self._stats.naked_singles += 1
+                    changed = True
+
+            # у цифры осталось единственное место в строке/столбце/квадрате
+            for unit in self._units:
+                once = more = used = 0
+                for i in unit:
+                    if values[i]:
+                        used |= 1 << (values[i] - 1)
+                    else:
+                        row, col, sq = cell_units[i]
+                        cand = full & ~(rows[row] | cols[col] | boxes[sq])
+                        more |= once & cand
+                        once |= cand
+                if (once | used) != full:
+                    return False
 
+                single = once & ~more
+                if single == 0:
+                    continue
+                for i in unit:
+                    if values[i] == 0:
+                        bit = self._candidates(i) & single
+                        if bit == 0:
+                            continue
+                        if bit & (bit - 1):
+                            return False
+                        self._place(i, bit, trail)
+                        self._stats.hidden_singles += 1
+                        changed = True
         return True
 
-    def fill_cell(self, i, j, number):
+    def _choose_cell(self):
         """
-        Функция, которая заполняет ячейку,
-        если значение удовлетворяет всем правилам игры
-        :param i: номер строки
-        :param j: номер столбца
-        :param number: значение, которым может быть
-        заполнена ячейка (цифра от 1 до 9)
-        :return: bool - True, если number соответствовало правилам
-        и было присовено ячейке, иначе False
+        Функция, которая выбирает клетку для ветвления
+        :return: int - пустая клетка с наименьшим числом кандидатов
+        или -1, если пустых клеток нет
         """
-        if (self._grid_mask[i][j]):
-            return False
+        best, best_count = -1, self._size + 1
+        for i in range(len(self._values)):
+            if self._values[i] == 0:
+                count = bin(self._candidates(i)).count('1')
+                if count < best_count:
+                    best, best_count = i, count
+                    if count == 2:
+                        break
+        return best
 
-        t = self._playing_field[i][j]
-        self._playing_field[i][j] = number
-        if all((self._check_row(i),
-                self._check_col(j),
-                self._check_square(Grid._get_num_of_square(i, j)))):
-            return True
-        else:
-            self._playing_field[i][j] = t
+    def _flush(self):
+        """
+        Функция, которая отдает накопленные ходы
+        :return: генератор ходов (строка, столбец, цифра, вид)
+        """
+        events, self._events = self._events, []
+        yield from events
+
+    def _steps(self, limit):
+        """
+        Функция перебора со своим стеком: распространение ограничений
+        и перебор кандидатов клетки с наименьшим их числом.
+        Ходы отдаются, если они записываются (см. _init_state)
+        :param limit: int - после limit найденных решений перебор
+        прекращается, последнее решение остается в состоянии
+        :return: генератор ходов; значение генератора (StopIteration) -
+        количество найденных решений (не больше limit)
+        """
+        start = perf_counter()
+        stats = self._stats
+        trail = []
+        # элементы стека: [клетка, оставшиеся кандидаты, длина журнала]
+        stack = []
+        count = 0
+
+        try:
+            stats.nodes += 1
+            ok = self._propagate(trail)
+            if self._events:
+                yield from self._flush()
+            while True:
+                if ok:
+                    best = self._choose_cell()
+                    if best != -1:
+                        stack.append([best, self._candidates(best),
+                                      len(trail)])
+                        if len(stack) > stats.max_depth:
+                            stats.max_depth = len(stack)
+                    else:
+                        count += 1
+                        if count >= limit:
+                            return count
+                else:
+                    stats.backtracks += 1
+
+                # следующий кандидат самой глубокой клетки, где он остался
+                while stack:
+                    frame = stack[-1]
+                    self._undo(trail, frame[2])
+                    if frame[1]:
+                        bit = frame[1] & -frame[1]
+                        frame[1] ^= bit
+                        self._place(frame[0], bit, trail)
+                        stats.nodes += 1
+                        ok = self._propagate(trail)
+                        break
+                    stack.pop()
+                else:
+                    self._undo(trail)
+                    if self._events:
+                        yield from self._flush()
+                    return count
+
+                if self._events:
+                    yield from self._flush()
+        finally:
+            stats.seconds += perf_counter() - start
+
+    def iter_steps(self, grid):
+        """
+        Функция пошагового поиска решения. Ходы отдаются по одному,
+        к моменту получения хода он уже записан в сетку.
+        Если решение найдено, сетка остается заполненной решением,
+        иначе все ходы отменяются
+        :param grid: Grid - сетка игрового поля
+        :return: генератор ходов (строка, столбец, цифра, вид), где вид -
+        'place' (цифра поставлена) или 'undo' (цифра убрана);
+        значение генератора - True, если решение найдено
+        """
+        if not self._init_state(grid.grid, events=True):
             return False
 
+        steps = self._steps(1)
+        while True:
+            try:
+                row, col, number, kind = next(steps)
+            except StopIteration as stop:
+                return stop.value > 0
 
-class SudokuSolver:
-    """Клас для поиска решения Судоку компьютером методом грубой силы"""
+            grid.set_cell(row, col, number if kind == 'place' else 0)
+            yield row, col, number, kind
+
+    def get_solution(self, grid):
+        """
+        Функция поиска решения Судоку
+        :param grid: Grid - сетка игрового поля
+        :return: bool - True, если решение найдено (сетка заполняется
+        решением), иначе False (сетка остается без изменений)
+        """
+        steps = self.iter_steps(grid)
+        while True:
+            try:
+                row, col, number, kind = next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+            if self._print_steps and kind == 'place':
+                grid.show()
+                print(f'\n({row + 1}, {col + 1}, {number})')
+
+    def count_solutions(self, grid, limit=2):
+        """
+        Функция подсчета решений Судоку
+        :param grid: Grid или list - сетка или игровое поле
+        (остается без изменений)
+        :param limit: int - после limit найденных решений подсчет
+        прекращается
+        :return: int - количество решений (не больше limit)
+        """
+        field = grid.grid if isinstance(grid, Grid) else grid
+        if not self._init_state(field):
+            return 0
+
+        # ходы не записываются, поэтому генератор сразу завершается
+        steps = self._steps(limit)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+    def is_unique(self, grid):
+        """
+        Функция, которая проверяет единственность решения
+        :param grid: Grid или list - сетка или игровое поле
+        :return: bool - True, если решение существует и единственно
+        """
+        return self.count_solutions(grid, 2) == 1
+
+
+# общий решатель для подсчета решений: состояние решателя
+# переиспользуется между вызовами, поле вызывающего не изменяется
+_counter = SudokuSolver()
+
+
+def count_solutions(grid, limit=2):
+    """
+    Функция подсчета решений Судоку с остановкой на limit найденных
+    :param grid: Grid или list - сетка или игровое поле
+    (остается без изменений)
+    :param limit: int - после limit найденных решений подсчет прекращается
+    :return: int - количество решений (не больше limit)
+    """
+    return _counter.count_solutions(grid, limit)
+
+
+def is_unique(grid):
+    """
+    Функция, которая проверяет единственность решения Судоку
+    :param grid: Grid или list - сетка или игровое поле
+    :return: bool - True, если решение существует и единственно
+    """
+    return _counter.is_unique(grid)
+
+
+def rate_puzzle(grid):
+    """
+    Функция оценки сложности Судоку: подсчет решений со счетчиками.
+    Дерево перебора проходится целиком (до второго решения), поэтому
+    оценка одинакова для головоломок, отличающихся обозначением цифр
+    :param grid: Grid или list - сетка или игровое поле
+    (остается без изменений)
+    :return: SolverStats - счетчики решения (оценка - difficulty)
+    """
+    _counter.count_solutions(grid, 2)
+    return _counter.stats
+
+
+class DancingLinksSolver:
+    """
+    Класс для поиска решения Судоку размера n^2 x n^2 как задачи
+    о точном покрытии (алгоритм X Кнута с танцующими ссылками).
+    Сначала выполняется распространение ограничений SudokuSolver
+    (единственный кандидат в клетке и единственное место для цифры),
+    затем матрица строится только по оставшимся кандидатам: столбцы -
+    невыполненные ограничения (клетка заполнена, цифра есть в строке,
+    в столбце и в квадрате), строки - варианты (клетка, цифра), каждый
+    покрывает ровно 4 ограничения. Ссылки хранятся в списках целых чисел.
+    Головоломки 16х16 и 25х25 с единственным решением решаются
+    за миллисекунды (редко - за десятые доли секунды). Ограничение:
+    поле 25х25, из которого случайно удалено примерно от 50 до 75%
+    клеток (много решений, область перехода к неразрешимости), может
+    решаться секунды и минуты - как и SudokuSolver
+    """
     def __init__(self):
         self._print_steps = False
+        self._propagator = SudokuSolver()
 
     def _set_print_steps(self, val):
         if (type(val) == bool):
@@ -351,47 +1140,1016 @@ class SudokuSolver:
     print_steps = property(fset=_set_print_steps)
     del _set_print_steps
 
-    @staticmethod
-    def _get_zero_index(grid):
+    def _cover(self, c):
         """
-        Функция поиска первого нулевого элемента (незаполненной ячейки)
-        :param grid: Grid - сетка игрового поля
-        return: индекс строки и стобца первого нулевого элемента
-        (слева направо сверху вниз), или (-1, -1) если нулевых элементов нет
+        Функция, которая исключает столбец и все пересекающие его строки
+        :param c: номер заголовка столбца
+        """
+        L, R, U, D, C, S = self._links
+        R[L[c]], L[R[c]] = R[c], L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                D[U[j]], U[D[j]] = D[j], U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def _uncover(self, c):
+        """
+        Функция, которая возвращает столбец (в обратном порядке)
+        :param c: номер заголовка столбца
         """
-        for i in range(len(grid.grid)):
-            for j in range(len(grid.grid[i])):
-                if (grid.grid[i][j] == 0):
-                    return i, j
-        return -1, -1
+        L, R, U, D, C, S = self._links
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = L[R[c]] = c
+
+    def _select(self, r):
+        """
+        Функция, которая выбирает строку: исключает остальные ее столбцы
+        и записывает цифру в сетку
+        :param r: узел выбранной строки
+        """
+        R, C = self._links[1], self._links[4]
+        j = R[r]
+        while j != r:
+            self._cover(C[j])
+            j = R[j]
 
-    def get_solution(self, grid):
+        self._set_cell(*self._decode(r))
+
+    def _set_cell(self, row, col, number):
+        """
+        Функция, которая записывает цифру в сетку (и выводит ход)
+        :param row: номер строки
+        :param col: номер столбца
+        :param number: цифра
+        """
+        self._grid.set_cell(row, col, number)
+        if self._print_steps:
+            self._grid.show()
+            print(f'\n({row + 1}, {col + 1}, {number})')
+
+    def _unselect(self, r):
         """
-        Функция рекурсивного поиска решения Судоку
+        Функция, которая отменяет выбор строки
+        :param r: узел выбранной строки
+        """
+        L, C = self._links[0], self._links[4]
+        j = L[r]
+        while j != r:
+            self._uncover(C[j])
+            j = L[j]
+
+        row, col, number = self._decode(r)
+        self._grid.clear_cell(row, col)
+
+    def _decode(self, r):
+        """
+        Функция, которая по узлу находит клетку и цифру
+        :param r: узел строки
+        :return: tuple - номер строки, номер столбца, цифра
+        """
+        cell, d = self._options[(r - self._first) // 4]
+        return cell // self._size, cell % self._size, d + 1
+
+    def _init_state(self, grid):
+        """
+        Функция, которая распространяет ограничения и строит ссылки
+        матрицы по оставшимся кандидатам
         :param grid: Grid - сетка игрового поля
-        :return: bool - True, если решение найдено, иначе False
+        :return: bool - False, если исходные цифры противоречат правилам
+        или распространение ограничений нашло противоречие
+        """
+        size = grid.size
+        area = size * size
+        self._grid = grid
+        self._size = size
+
+        # клетки, заполненные распространением, в матрицу не попадают
+        propagator = self._propagator
+        self._forced = []
+        if not (propagator._init_state(grid.grid)
+                and propagator._propagate(self._forced)):
+            return False
+
+        # варианты (клетка, цифра) и номера их ограничений
+        options = []
+        for i in range(area):
+            if propagator._values[i]:
+                continue
+            row, col, sq = propagator._cell_units[i]
+            cand = propagator._candidates(i)
+            while cand:
+                bit = cand & -cand
+                cand ^= bit
+                d = bit.bit_length() - 1
+                options.append((i, d, (i, area + row * size + d,
+                                       2 * area + col * size + d,
+                                       3 * area + sq * size + d)))
+
+        # узел 0 - корень, 1..num_cols - заголовки столбцов
+        # (столбцы в порядке ограничений)
+        keys = sorted({key for i, d, row in options for key in row})
+        column = {key: c for c, key in enumerate(keys, 1)}
+        num_cols = len(keys)
+        num_nodes = num_cols + 1 + 4 * len(options)
+        L = [i - 1 for i in range(num_nodes)]
+        R = [i + 1 for i in range(num_nodes)]
+        L[0], R[num_cols] = num_cols, 0
+        U = [*range(num_nodes)]
+        D = [*range(num_nodes)]
+        C = [*range(num_nodes)]
+        S = [0] * (num_cols + 1)
+
+        node = num_cols + 1
+        for i, d, row in options:
+            for k, key in enumerate(row):
+                c = column[key]
+                j = node + k
+                L[j] = node + (k - 1) % 4
+                R[j] = node + (k + 1) % 4
+                # добавляем узел в конец столбца c
+                U[j], D[j] = U[c], c
+                D[U[c]] = j
+                U[c] = j
+                C[j] = c
+                S[c] += 1
+            node += 4
+
+        self._first = num_cols + 1
+        self._options = [(i, d) for i, d, row in options]
+        self._links = [L, R, U, D, C, S]
+        return True
+
+    def _search(self):
+        """
+        Функция перебора (без рекурсии, со стеком выбранных строк):
+        на каждом шаге берется столбец с наименьшим числом строк
+        :return: bool - True, если решение найдено
         """
-        zero = SudokuSolver._get_zero_index(grid)
-        if (zero == (-1, -1)):
-            if grid.check_grid():
+        L, R, U, D, C, S = self._links
+        stack = []
+        while True:
+            if R[0] == 0:
                 return True
+
+            # столбец с наименьшим числом вариантов
+            c, best = 0, len(S)
+            j = R[0]
+            while j != 0:
+                if S[j] < best:
+                    c, best = j, S[j]
+                    if best <= 1:
+                        break
+                j = R[j]
+
+            if best:
+                self._cover(c)
+                stack.append(D[c])
+                self._select(D[c])
+                continue
+
+            # тупик: откатываемся до строки, у которой есть следующая
+            while stack:
+                r = stack.pop()
+                self._unselect(r)
+                r = D[r]
+                if r != C[r]:
+                    stack.append(r)
+                    self._select(r)
+                    break
+                self._uncover(C[r])
             else:
                 return False
 
-        for number in range(1, 10):
-            if grid.fill_cell(zero[0], zero[1], number):
-                if self._print_steps:
-                    grid.show()
-                    print(f'\n({zero[0] + 1}, {zero[1] + 1}, {number})')
+    def get_solution(self, grid):
+        """
+        Функция поиска решения Судоку
+        :param grid: Grid - сетка игрового поля
+        :return: bool - True, если решение найдено (сетка заполняется
+        решением), иначе False (сетка остается без изменений)
+        """
+        if not self._init_state(grid):
+            return False
 
-                if self.get_solution(grid):
-                    return True
-        grid.grid[zero[0]][zero[1]] = 0
+        values = self._propagator._values
+        for i in self._forced:
+            self._set_cell(i // self._size, i % self._size, values[i])
+        if self._search():
+            return True
+        for i in self._forced:
+            grid.clear_cell(i // self._size, i % self._size)
         return False
 
 
+class SudokuGenerator:
+    """
+    Класс для генерации головоломок с единственным решением.
+    Из заполненной сетки клетки удаляются в случайном порядке, каждая
+    пробуется один раз: если после удаления решений становится больше
+    одного (подсчет останавливается на втором), цифра возвращается
+    """
+    def __init__(self, box_size=3, seed=None):
+        """
+        :param box_size: int - размер квадрата n (поле n^2 x n^2)
+        :param seed: зерно генератора случайных чисел
+        """
+        self._box = box_size
+        self._size = box_size ** 2
+        self._random = Random(seed)
+        self._solver = SudokuSolver()
+
+    def get_full_grid(self):
+        """
+        Функция генерации случайной заполненной сетки: квадраты
+        на диагонали не зависят друг от друга и заполняются случайными
+        перестановками, остальные клетки дополняет решатель. Не у каждого
+        заполнения диагонали есть решение (у 4х4 - примерно у половины),
+        поэтому диагональ заполняется заново, пока решение не найдется
+        :return: list - заполненное игровое поле
+        """
+        box, size = self._box, self._size
+        while True:
+            field = [[0] * size for i in range(size)]
+            for b in range(box):
+                digits = self._random.sample(range(1, size + 1), size)
+                for k in range(size):
+                    field[b * box + k // box][b * box + k % box] = digits[k]
+
+            grid = Grid(field)
+            if self._solver.get_solution(grid):
+                return [list(row) for row in grid.grid]
+
+    def drop_cells(self, field, n=None):
+        """
+        Функция удаления клеток с сохранением единственности решения
+        :param field: list - игровое поле с единственным решением
+        :param n: int - сколько клеток удалить (по умолчанию - пока
+        можно, получается минимальная головоломка)
+        :return: list - новое игровое поле
+        """
+        field = [list(row) for row in field]
+        cells = [
+            (i, j) for i in range(self._size) for j in range(self._size)
+            if field[i][j]
+        ]
+        self._random.shuffle(cells)
+
+        num_drop_cells = 0
+        for i, j in cells:
+            if n is not None and num_drop_cells >= n:
+                break
+
+            t = field[i][j]
+            field[i][j] = 0
+            if self._solver.is_unique(field):
+                num_drop_cells += 1
+            else:
+                field[i][j] = t
+
+        if not self._solver.is_unique(field):
+            raise RuntimeError('У головоломки должно быть одно решение')
+        return field
+
+    def get_puzzle(self, num_clues=None, difficulty=None, attempts=100):
+        """
+        Функция генерации головоломки
+        :param num_clues: int - желаемое количество заполненных клеток
+        (по умолчанию - сколько останется в минимальной головоломке).
+        Если с единственным решением столько не получить,
+        заполненных клеток будет больше
+        :param difficulty: str или tuple - диапазон оценки сложности:
+        имя из DIFFICULTY_BANDS или (от, до), верхняя граница
+        не включается. Головоломки вне диапазона отбрасываются
+        :param attempts: int - сколько головоломок пробовать
+        для попадания в диапазон
+        :return: list - игровое поле
+        """
+        n = None
+        if num_clues is not None:
+            n = max(self._size ** 2 - num_clues, 0)
+        if difficulty is None:
+            return self.drop_cells(self.get_full_grid(), n)
+
+        low, high = DIFFICULTY_BANDS.get(difficulty, difficulty)
+        for i in range(attempts):
+            field = self.drop_cells(self.get_full_grid(), n)
+            # все дерево перебора, как в rate_puzzle
+            self._solver.count_solutions(field, 2)
+            if low <= self._solver.stats.difficulty < high:
+                return field
+        raise RuntimeError(f'За {attempts} попыток не получено головоломки '
+                           f'со сложностью от {low} до {high}')
+
+
+# символы цифр в однострочной записи поля (до 25х25), пустая клетка - '.'
+SYMBOLS = '123456789ABCDEFGHIJKLMNOP'
+
+
+def grid_to_line(field):
+    """
+    Функция записи игрового поля в одну строку
+    (для 9х9 - стандартные 81 символ)
+    :param field: list - игровое поле
+    :return: str - строка без перевода строки
+    """
+    return ''.join(
+        SYMBOLS[val - 1] if val else '.' for row in field for val in row
+    )
+
+
+def line_to_grid(line):
+    """
+    Функция чтения игрового поля из одной строки.
+    Пустая клетка - '.' или '0'
+    :param line: str - строка длины n^4 (поле от 4х4 до 25х25)
+    :return: list - игровое поле
+    """
+    line = line.strip()
+    size = int(round(len(line) ** 0.5))
+    if (size ** 2 != len(line) or int(round(size ** 0.5)) ** 2 != size
+            or not 4 <= size <= len(SYMBOLS)):
+        raise ValueError(f'Некорректная длина строки: {len(line)}')
+
+    values = []
+    for c in line.upper():
+        if c in '.0':
+            values.append(0)
+        elif c in SYMBOLS[:size]:
+            values.append(SYMBOLS.index(c) + 1)
+        else:
+            raise ValueError(f'Некорректный символ: {c!r}')
+    return [values[i * size: (i + 1) * size] for i in range(size)]
+
+
+def _refine_columns(row, labels, stacks, parts):
+    """
+    Функция, которая упорядочивает еще не упорядоченные столбцы так,
+    чтобы строка после переименования цифр была наименьшей.
+    Порядок столбцов задан частично: stacks - группы зон столбцов,
+    порядок внутри группы еще не выбран; parts - для каждой зоны
+    группы столбцов, порядок внутри группы еще не выбран
+    :param row: list - значения клеток строки
+    :param labels: list - новые имена цифр (0 - еще не назначено)
+    :param stacks: list - группы зон столбцов (tuple) по порядку
+    :param parts: list - группы столбцов (tuple) каждой зоны по порядку
+    :return: tuple - строка после переименования и генератор вариантов
+    (labels, stacks, parts) - если одинаковую строку дают несколько
+    порядков с разным переименованием, перебираются все
+    """
+    new = len(row) + 1
+    patterns = {}
+    splits = {}
+    for group in stacks:
+        for s in group:
+            pattern = []
+            split = []
+            for cols in parts[s]:
+                zeros = tuple(c for c in cols if not row[c])
+                known = sorted((c for c in cols if row[c] and labels[row[c]]),
+                               key=lambda c: labels[row[c]])
+                fresh = [c for c in cols if row[c] and not labels[row[c]]]
+                if zeros:
+                    split.append([(zeros,)])
+                split += [[((c,),)] for c in known]
+                if len(fresh) > 1:
+                    # новые цифры дают одинаковую строку в любом порядке,
+                    # но разное переименование - нужен перебор
+                    split.append([tuple((c,) for c in perm)
+                                  for perm in permutations(fresh)])
+                elif fresh:
+                    split.append([((fresh[0],),)])
+                pattern += [0] * len(zeros)
+                pattern += [labels[row[c]] for c in known]
+                pattern += [new] * len(fresh)
+            patterns[s] = tuple(pattern)
+            splits[s] = split
+
+    sequence = []
+    label = max(labels)
+    stack_options = []
+    for group in stacks:
+        group = sorted(group, key=patterns.get)
+        start = 0
+        while start < len(group):
+            end = start + 1
+            while (end < len(group)
+                   and patterns[group[end]] == patterns[group[start]]):
+                end += 1
+            tied = group[start: end]
+            pattern = patterns[tied[0]]
+            if len(tied) > 1 and new in pattern:
+                stack_options.append([[(s,) for s in perm]
+                                      for perm in permutations(tied)])
+            else:
+                stack_options.append([[tuple(tied)]])
+            for s in tied:
+                for val in pattern:
+                    if val == new:
+                        label += 1
+                        val = label
+                    sequence.append(val)
+            start = end
+
+    def get_options():
+        """Генератор вариантов (строятся, только если строка выбрана)"""
+        for new_parts in product(*(list(product(*splits[s]))
+                                   for s in range(len(parts)))):
+            new_parts = [[cols for part in split for cols in part]
+                         for split in new_parts]
+            for new_stacks in product(*stack_options):
+                new_stacks = [group for groups in new_stacks
+                              for group in groups]
+                new_labels = labels[:]
+                label = max(labels)
+                for group in new_stacks:
+                    for s in group:
+                        for cols in new_parts[s]:
+                            val = row[cols[0]]
+                            if val and not new_labels[val]:
+                                label += 1
+                                new_labels[val] = label
+                yield new_labels, new_stacks, new_parts
+
+    return sequence, get_options()
+
+
+def canonicalize(field, max_nodes=2000):
+    """
+    Функция приведения головоломки к канонической форме относительно
+    преобразований, которые не меняют правил (как в Grid._shuffle_grid):
+    транспонирования, перестановок строк внутри зоны и зон строк,
+    того же для столбцов, а также переименования цифр.
+    Каноническая форма - наименьшая запись (пустая клетка - 0, цифры
+    переименованы по порядку первого появления) среди всех
+    преобразованных полей, поэтому у всех преобразованных копий
+    головоломки она одна и та же. Строки канонического поля
+    выбираются по одной, а столбцы упорядочиваются по мере выбора
+    строк, поэтому перебираются только варианты с наименьшим началом
+    :param field: list - игровое поле (без повторов цифр в строках
+    и столбцах, иначе ValueError)
+    :param max_nodes: int - наибольшее количество вариантов перебора
+    (None - без ограничения). У полей с большой симметрией (например,
+    заполненных по образцу) вариантов с одинаковым началом очень много,
+    поэтому при превышении бросается RuntimeError
+    :return: tuple - каноническая форма (строка, как в grid_to_line)
+    и преобразование (транспонировано, порядок строк, порядок столбцов,
+    новые имена цифр), переводящее поле в каноническую форму:
+    canon[t][u] = labels[field'[rows[t]][cols[u]]]
+    """
+    size = len(field)
+    box = int(round(size ** 0.5))
+    if box ** 2 != size or any(len(row) != size for row in field):
+        raise ValueError('Размер поля должен быть n^2 x n^2!')
+    for line in [*field, *zip(*field)]:
+        digits = [val for val in line if val]
+        if len(set(digits)) != len(digits):
+            raise ValueError('Цифра повторяется в строке или столбце!')
+
+    best = []
+    result = None
+    nodes = 0
+
+    def place(t, order, labels, stacks, parts, out):
+        """
+        Функция выбора t-й строки канонического поля
+        :param t: int - номер строки канонического поля
+        :param order: list - уже выбранные строки
+        :param labels: list - новые имена цифр (0 - еще не назначено)
+        :param stacks: list - группы зон столбцов
+        :param parts: list - группы столбцов каждой зоны
+        :param out: list - уже записанные клетки канонического поля
+        """
+        nonlocal best, result, nodes
+        nodes += 1
+        if max_nodes is not None and nodes > max_nodes:
+            raise RuntimeError(f'Приведение к канонической форме превысило '
+                               f'{max_nodes} вариантов перебора')
+        if t == size:
+            if not best or out < best:
+                cols = [c for group in stacks for s in group
+                        for cols in parts[s] for c in cols]
+                best, result = out, (transposed, order, cols, labels)
+            return
+
+        if t % box:
+            bands = [order[-1] // box]
+        else:
+            used = {r // box for r in order}
+            bands = [b for b in range(box) if b not in used]
+
+        # одинаковые зоны (и одинаковые строки внутри зоны)
+        # взаимозаменяемы, поэтому из них перебирается только одна
+        variants = []
+        seen_bands = set()
+        for b in bands:
+            lines = range(b * box, (b + 1) * box)
+            if not t % box:
+                content = tuple(sorted(tuple(rows[r]) for r in lines))
+                if content in seen_bands:
+                    continue
+                seen_bands.add(content)
+
+            seen = set()
+            for r in lines:
+                if r in order or tuple(rows[r]) in seen:
+                    continue
+                seen.add(tuple(rows[r]))
+                sequence, options = _refine_columns(rows[r], labels,
+                                                    stacks, parts)
+                variants.append((sequence, r, options))
+
+        sequence = min(val for val, r, options in variants)
+        prefix = out + sequence
+        if best and prefix > best[:len(prefix)]:
+            return
+        for val, r, options in variants:
+            if val == sequence:
+                for new_labels, new_stacks, new_parts in options:
+                    place(t + 1, order + [r], new_labels, new_stacks,
+                          new_parts, prefix)
+
+    start_stacks = [tuple(range(box))]
+    start_parts = [[tuple(range(s * box, (s + 1) * box))]
+                   for s in range(box)]
+    for transposed in (False, True):
+        rows = [*map(list, zip(*field))] if transposed else field
+        place(0, [], [0] * (size + 1), start_stacks, start_parts, [])
+
+    # цифры, которых нет на поле, получают оставшиеся имена по порядку
+    transposed, order, cols, labels = result
+    label = max(labels)
+    for val in range(1, size + 1):
+        if not labels[val]:
+            label += 1
+            labels[val] = label
+
+    form = [best[t * size: (t + 1) * size] for t in range(size)]
+    return grid_to_line(form), (transposed, order, cols, labels)
+
+
+class SolutionCache:
+    """
+    Кэш решений ограниченного размера. Ключ - каноническая форма
+    головоломки (canonicalize), значение - решение канонической формы.
+    При переполнении удаляется решение, к которому дольше всего
+    не обращались
+    """
+    def __init__(self, maxsize=1024):
+        """
+        :param maxsize: int - наибольшее количество решений в кэше
+        """
+        if maxsize < 1:
+            raise ValueError('Размер кэша должен быть больше 0!')
+        self._maxsize = maxsize
+        self._solutions = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    def __len__(self):
+        return len(self._solutions)
+
+    def __contains__(self, form):
+        return form in self._solutions
+
+    def get(self, form):
+        """
+        Функция поиска решения в кэше
+        :param form: str - каноническая форма головоломки
+        :return: bytes - решение (пустое, если решения нет)
+        или None, если головоломки нет в кэше
+        """
+        solution = self._solutions.get(form)
+        if solution is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._solutions.move_to_end(form)
+        return solution
+
+    def put(self, form, solution):
+        """
+        Функция записи решения в кэш
+        :param form: str - каноническая форма головоломки
+        :param solution: bytes - решение канонической формы
+        (пустое, если решения нет)
+        """
+        self._solutions[form] = solution
+        self._solutions.move_to_end(form)
+        if len(self._solutions) > self._maxsize:
+            self._solutions.popitem(last=False)
+
+    def clear(self):
+        """Функция очистки кэша"""
+        self._solutions.clear()
+        self.hits = self.misses = 0
+
+
+class CachingSolver:
+    """
+    Решатель с кэшем решений. Головоломка приводится к канонической
+    форме, поэтому преобразованная копия уже решенной головоломки
+    (транспонирование, перестановки строк, столбцов, зон, цифр)
+    решается без перебора: решение берется из кэша и переводится
+    обратным преобразованием. Приведение к канонической форме занимает
+    несколько миллисекунд, поэтому кэш выгоден для трудных головоломок
+    и больших полей: простую 9х9 SudokuSolver решает быстрее.
+    Если приведение не уложилось в max_nodes вариантов перебора
+    (поля с большой симметрией), головоломка решается без кэша
+    """
+    def __init__(self, solver=None, maxsize=1024, max_nodes=1000):
+        """
+        :param solver: решатель для головоломок, которых нет в кэше
+        (по умолчанию - SudokuSolver)
+        :param maxsize: int - наибольшее количество решений в кэше
+        :param max_nodes: int - наибольшее количество вариантов перебора
+        при приведении к канонической форме
+        """
+        self._solver = solver if solver is not None else SudokuSolver()
+        self._cache = SolutionCache(maxsize)
+        self._max_nodes = max_nodes
+
+    @property
+    def cache(self):
+        """SolutionCache - кэш решений"""
+        return self._cache
+
+    def get_solution(self, grid):
+        """
+        Функция поиска решения Судоку
+        :param grid: Grid - сетка игрового поля
+        :return: bool - True, если решение найдено (сетка заполняется
+        решением), иначе False (сетка остается без изменений)
+        """
+        try:
+            form, transform = canonicalize(grid.grid, self._max_nodes)
+        except ValueError:
+            return False
+        except RuntimeError:
+            return self._solver.get_solution(grid)
+        transposed, order, cols, labels = transform
+
+        solution = self._cache.get(form)
+        if solution is None:
+            canon = Grid(line_to_grid(form))
+            solution = (canon.values if self._solver.get_solution(canon)
+                        else b'')
+            self._cache.put(form, solution)
+        if not solution:
+            return False
+
+        # обратное преобразование: canon[t][u] = labels[field'[r][c]]
+        size = grid.size
+        digits = [0] * (size + 1)
+        for val in range(1, size + 1):
+            digits[labels[val]] = val
+        for t, r in enumerate(order):
+            for u, c in enumerate(cols):
+                i, j = (c, r) if transposed else (r, c)
+                if not grid.get_cell(i, j):
+                    grid.set_cell(i, j, digits[solution[t * size + u]])
+        return True
+
+
+class CandidateTracker:
+    """
+    Класс, который следит за кандидатами клеток во время игры.
+    Кандидаты клетки вычисляются по маскам сетки за O(1), а множества
+    клеток с единственным кандидатом и клеток без кандидатов (тупиков)
+    обновляются после каждого хода только для строки, столбца
+    и квадрата изменившейся клетки
+    """
+    # размер поля -> соседи каждой клетки (включая ее саму)
+    _peers = {}
+
+    def __init__(self, grid):
+        """
+        :param grid: Grid - сетка игрового поля
+        """
+        size = grid.size
+        if size not in CandidateTracker._peers:
+            cell_units, units = SudokuSolver._get_structure(size)
+            CandidateTracker._peers[size] = tuple(
+                tuple(sorted({k for unit in (units[row], units[size + col],
+                                             units[2 * size + sq])
+                              for k in unit}))
+                for row, col, sq in cell_units
+            )
+        self._grid = grid
+        self._peers = CandidateTracker._peers[size]
+        self._singles = {}
+        self._dead = set()
+        for k in range(size * size):
+            self._check(k)
+
+    def _check(self, k):
+        """
+        Функция, которая пересчитывает состояние клетки
+        :param k: номер клетки (слева направо сверху вниз)
+        """
+        self._singles.pop(k, None)
+        self._dead.discard(k)
+
+        row, col = divmod(k, self._grid.size)
+        if self._grid.get_cell(row, col):
+            return
+        candidates = self._grid.get_candidates(row, col)
+        if not candidates:
+            self._dead.add(k)
+        elif len(candidates) == 1:
+            self._singles[k] = candidates[0]
+
+    def update(self, row, col):
+        """
+        Функция обновления после изменения клетки
+        :param row: номер строки
+        :param col: номер столбца
+        """
+        for k in self._peers[row * self._grid.size + col]:
+            self._check(k)
+
+    def get_candidates(self, row, col):
+        """
+        Функция, которая возвращает кандидатов клетки
+        :param row: номер строки
+        :param col: номер столбца
+        :return: list - числа, которые можно поставить в клетку
+        """
+        return self._grid.get_candidates(row, col)
+
+    def get_hint(self):
+        """
+        Функция подсказки: клетка, в которую можно поставить только
+        одно число
+        :return: tuple - (строка, столбец, число) или None
+        """
+        for k, number in self._singles.items():
+            return (*divmod(k, self._grid.size), number)
+        return None
+
+    @property
+    def dead_ends(self):
+        """Пустые клетки, в которые нельзя поставить ни одного числа"""
+        return [divmod(k, self._grid.size) for k in sorted(self._dead)]
+
+
+class SaveSlot:
+    """
+    Класс сохранения игры в именованный слот - файл <имя>.sudoku.
+    Формат (версия 1): сигнатура b'SDKU', байт версии, байт размера
+    квадрата n, n^4 байт исходного поля, битовая маска исходных клеток
+    (n^4 бит, little-endian), затем журнал ходов по 3 байта: строка,
+    столбец, число (0 - очистка клетки). Отмена и повтор хода
+    записываются маркерами (255, 255, 0) и (255, 255, 1).
+    Журнал только дописывается, поэтому автосохранение хода - это
+    запись 3 байт в конец файла, а загрузка - повтор журнала
+    """
+    MAGIC = b'SDKU'
+    VERSION = 1
+    EXTENSION = '.sudoku'
+    _UNDO = b'\xff\xff\x00'
+    _REDO = b'\xff\xff\x01'
+
+    def __init__(self, name, directory='saves'):
+        """
+        :param name: str - имя слота
+        :param directory: str - директория сохранений
+        """
+        self._name = name
+        self._directory = directory
+        self._path = os.path.join(directory, name + SaveSlot.EXTENSION)
+        self._start = None
+        # сделанные ходы (строка, столбец, было, стало) и отмененные
+        self._moves = []
+        self._undone = []
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def path(self):
+        return self._path
+
+    @staticmethod
+    def new(prefix='autosave', directory='saves'):
+        """
+        Функция, которая создает слот с новым именем: префикс, дата
+        и время (и номер, если такой слот уже есть), поэтому
+        существующие сохранения не перезаписываются
+        :param prefix: str - начало имени слота
+        :param directory: str - директория сохранений
+        :return: SaveSlot - слот (файл создается в create)
+        """
+        name = f"{prefix}-{strftime('%Y%m%d-%H%M%S')}"
+        names = set(SaveSlot.get_slots(directory))
+        candidate, i = name, 1
+        while candidate in names:
+            i += 1
+            candidate = f'{name}-{i}'
+        return SaveSlot(candidate, directory)
+
+    @staticmethod
+    def get_slots(directory='saves'):
+        """
+        Функция, которая находит сохранения
+        :param directory: str - директория сохранений
+        :return: list - имена слотов
+        """
+        try:
+            files = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            os.path.splitext(name)[0] for name in files
+            if name.endswith(SaveSlot.EXTENSION)
+        )
+
+    def _write(self, journal=b''):
+        """
+        Функция записи файла: заголовок, исходное поле и журнал
+        :param journal: bytes - журнал ходов
+        """
+        values, givens = self._start
+        box = int(round(len(values) ** 0.25))
+        os.makedirs(self._directory, exist_ok=True)
+        with open(self._path, 'wb') as file:
+            file.write(SaveSlot.MAGIC + bytes((SaveSlot.VERSION, box))
+                       + values
+                       + givens.to_bytes((len(values) + 7) // 8, 'little')
+                       + journal)
+
+    def _append(self, record):
+        """
+        Функция, которая дописывает запись в журнал
+        :param record: bytes - запись из 3 байт
+        """
+        with open(self._path, 'ab') as file:
+            file.write(record)
+
+    def create(self, grid):
+        """
+        Функция создания сохранения: текущее поле становится исходным,
+        журнал пуст
+        :param grid: Grid - сетка игрового поля
+        """
+        self._start = (grid.values, grid.givens)
+        self._moves = []
+        self._undone = []
+        self._write()
+
+    def save_as(self, name):
+        """
+        Функция сохранения игры в другой слот вместе с ходами
+        (отмененные ходы не сохраняются)
+        :param name: str - имя нового слота
+        :return: SaveSlot - новый слот
+        """
+        slot = SaveSlot(name, self._directory)
+        slot._start = self._start
+        slot._moves = self._moves[:]
+        slot._write(b''.join(bytes((row, col, new))
+                             for row, col, old, new in self._moves))
+        return slot
+
+    def _apply(self, grid, row, col, number):
+        """
+        Функция, которая повторяет ход из журнала
+        :param grid: Grid - сетка игрового поля
+        :param row: номер строки
+        :param col: номер столбца
+        :param number: число (0 - очистка клетки)
+        """
+        if (row >= grid.size or col >= grid.size or number > grid.size
+                or grid.is_given(row, col)):
+            raise ValueError(f'Некорректный ход в сохранении: '
+                             f'{row}, {col}, {number}')
+        self._moves.append((row, col, grid.get_cell(row, col), number))
+        self._undone = []
+        grid.set_cell(row, col, number)
+
+    def load(self):
+        """
+        Функция загрузки: исходное поле и повтор журнала.
+        Неполная запись в конце журнала (прерванное автосохранение)
+        отбрасывается
+        :return: Grid - сетка игрового поля
+        """
+        with open(self._path, 'rb') as file:
+            data = file.read()
+
+        if data[:4] != SaveSlot.MAGIC:
+            raise ValueError('Файл не является сохранением Судоку')
+        if len(data) < 6 or data[4] != SaveSlot.VERSION:
+            raise ValueError('Неподдерживаемая версия сохранения')
+        area = data[5] ** 4
+        start = 6 + area + (area + 7) // 8
+        if len(data) < start:
+            raise ValueError('Сохранение повреждено')
+
+        values = data[6: 6 + area]
+        givens = int.from_bytes(data[6 + area: start], 'little')
+        grid = Grid.from_values(values, givens)
+        self._start = (values, givens)
+        self._moves = []
+        self._undone = []
+
+        end = start + (len(data) - start) // 3 * 3
+        for k in range(start, end, 3):
+            record = data[k: k + 3]
+            if record == SaveSlot._UNDO:
+                if self._undo(grid) is None:
+                    raise ValueError('Сохранение повреждено')
+            elif record == SaveSlot._REDO:
+                if self._redo(grid) is None:
+                    raise ValueError('Сохранение повреждено')
+            else:
+                self._apply(grid, *record)
+
+        if end != len(data):
+            with open(self._path, 'r+b') as file:
+                file.truncate(end)
+        return grid
+
+    def record(self, row, col, old, number):
+        """
+        Функция автосохранения хода
+        :param row: номер строки
+        :param col: номер столбца
+        :param old: число в клетке до хода
+        :param number: число после хода (0 - очистка клетки)
+        """
+        self._moves.append((row, col, old, number))
+        self._undone = []
+        self._append(bytes((row, col, number)))
+
+    def _undo(self, grid):
+        """
+        Функция отмены хода без записи в журнал
+        :param grid: Grid - сетка игрового поля
+        :return: tuple - отмененный ход или None, если ходов нет
+        """
+        if not self._moves:
+            return None
+        move = self._moves.pop()
+        grid.set_cell(move[0], move[1], move[2])
+        self._undone.append(move)
+        return move
+
+    def _redo(self, grid):
+        """
+        Функция повтора отмененного хода без записи в журнал
+        :param grid: Grid - сетка игрового поля
+        :return: tuple - повторенный ход или None, если повторять нечего
+        """
+        if not self._undone:
+            return None
+        move = self._undone.pop()
+        grid.set_cell(move[0], move[1], move[3])
+        self._moves.append(move)
+        return move
+
+    def undo(self, grid):
+        """
+        Функция отмены последнего хода
+        :param grid: Grid - сетка игрового поля
+        :return: tuple - ход (строка, столбец, было, стало) или None
+        """
+        move = self._undo(grid)
+        if move is not None:
+            self._append(SaveSlot._UNDO)
+        return move
+
+    def redo(self, grid):
+        """
+        Функция повтора отмененного хода
+        :param grid: Grid - сетка игрового поля
+        :return: tuple - ход (строка, столбец, было, стало) или None
+        """
+        move = self._redo(grid)
+        if move is not None:
+            self._append(SaveSlot._REDO)
+        return move
+
+
 class SudokuGame:
     """Класс, описывающий процесс игры в Судоку"""
+    # сохранение старых версий (pickle сетки), только для загрузки
+    LEGACY_SAVE = 'game.pkl'
+
     def start_game(self):
         """Функция запуска игры"""
 
@@ -444,44 +2202,128 @@ class SudokuGame:
         os.system('cls' if os.name == 'nt' else 'clear')
 
     @staticmethod
-    def _save_game(grid):
+    def _print_dead_ends(tracker):
         """
-        Функция для сохранения игры
-        :param grid: Grid - сетка игрового поля
+        Функция, которая предупреждает о клетках без кандидатов
+        :param tracker: CandidateTracker - кандидаты клеток
         """
-        with open('game.pkl', 'wb+') as file:
-            pickle.dump(grid, file)
+        dead_ends = tracker.dead_ends
+        if dead_ends:
+            cells = ', '.join(f'({i + 1}, {j + 1})' for i, j in dead_ends)
+            print(f'Тупик: в клетки {cells} нельзя поставить ни одного '
+                  'числа! Отмените ход.')
+
+    @staticmethod
+    def _print_candidates(tracker):
+        """
+        Функция, которая выводит кандидатов выбранной клетки
+        :param tracker: CandidateTracker - кандидаты клеток
+        """
+        answ = input('Введите 2 цифры от 1 до 9 через пробел: '
+                     'Строка, Колонка\n').split()
+        if (len(answ) != 2 or not all(map(str.isdigit, answ))
+                or not all(1 <= int(x) <= 9 for x in answ)):
+            print('Введите 2 цифры от 1 до 9!')
+            return
+
+        i, j = int(answ[0]) - 1, int(answ[1]) - 1
+        candidates = tracker.get_candidates(i, j)
+        if candidates:
+            print(f'Кандидаты клетки ({i + 1}, {j + 1}): '
+                  + ', '.join(map(str, candidates)))
+        else:
+            print('Клетка заполнена или в нее нельзя поставить ни одного '
+                  'числа!')
+
+    @staticmethod
+    def _get_slot_name():
+        """
+        Функция, которая получает от пользователя имя слота сохранения
+        :return: str - имя слота или None, если имя некорректно
+        """
+        name = input('Введите имя сохранения (буквы, цифры, _ и -):\n')
+        name = name.strip()
+        if name and all(c.isalnum() or c in '_-' for c in name):
+            return name
+        print('Некорректное имя сохранения!')
+        return None
 
     @staticmethod
     def _load_game():
         """
-        Функция для загрузки последнего сохранения
-        :return: Grid - сохраненная сетка игрового поля
+        Функция для загрузки сохранения из выбранного слота
+        :return: tuple - сохраненная сетка игрового поля и слот
+        или None, если загрузить игру не удалось
         """
+        names = SaveSlot.get_slots()
+        items = names[:]
+        if os.path.exists(SudokuGame.LEGACY_SAVE):
+            items.append(f'{SudokuGame.LEGACY_SAVE} (старое сохранение)')
+        if not items:
+            print('Нет сохраненной игры!')
+            return None
+
+        k = int(SudokuGame._game_menu(items)) - 1
+        if k == len(names):
+            return SudokuGame._load_legacy_game()
+
+        slot = SaveSlot(names[k])
         try:
-            with open('game.pkl', 'rb') as file:
-                return pickle.load(file)
-        except FileNotFoundError:
+            return slot.load(), slot
+        except (OSError, ValueError) as error:
+            print(f'Не удалось загрузить игру: {error}')
             return None
 
+    @staticmethod
+    def _load_legacy_game():
+        """
+        Функция для загрузки сохранения старой версии (game.pkl):
+        сетка переносится в новый слот, сам файл не изменяется
+        :return: tuple - сохраненная сетка игрового поля и слот
+        или None, если загрузить игру не удалось
+        """
+        try:
+            with open(SudokuGame.LEGACY_SAVE, 'rb') as file:
+                grid = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError) as error:
+            print(f'Не удалось загрузить игру: {error}')
+            return None
+        if not isinstance(grid, Grid):
+            print('Не удалось загрузить игру: файл не является '
+                  'сохранением Судоку')
+            return None
+
+        slot = SaveSlot.new()
+        slot.create(grid)
+        print(f'Старое сохранение перенесено в слот {slot.name}!')
+        return grid, slot
+
     def _user_game_mode(self):
         """Функция, реализующая режим игры для пользователя"""
 
         SudokuGame._cls()
 
         print('Режим игры для пользователя')
+        loaded = None
         if (SudokuGame._game_menu([
             'Начать новую игру',
-            'Загрузить последнюю игру'
-        ]) == '1'):
-            grid = Grid(num_drop_cells=81 - SudokuGame._get_num_of_cells())
-            grid.show()
+            'Загрузить сохраненную игру'
+        ]) == '2'):
+            loaded = self._load_game()
+            if not loaded:
+                print('Начата новая игра!')
+
+        if loaded:
+            grid, slot = loaded
         else:
-            grid = self._load_game()
-            if not grid:
-                print('Нет сохраненной игры! Начата новая игра!')
-                grid = Grid(num_drop_cells=81 - SudokuGame._get_num_of_cells())
-            grid.show()
+            grid = Grid(num_drop_cells=81 - SudokuGame._get_num_of_cells())
+            # каждый ход автоматически дописывается в новый слот
+            # autosave-<дата>-<время>, прежние игры не перезаписываются
+            slot = SaveSlot.new()
+            slot.create(grid)
+        tracker = CandidateTracker(grid)
+        grid.show()
+        SudokuGame._print_dead_ends(tracker)
 
         while not grid.check_grid():
             answ = input("\nВведите 3 цифры от 1 до 9 через пробел: "
@@ -492,7 +2334,11 @@ class SudokuGame:
                     menu_item = SudokuGame._game_menu([
                         'Продолжить',
                         'Правила',
+                        'Подсказка',
+                        'Показать кандидатов клетки',
                         'Сохранить игру',
+                        'Отменить ход',
+                        'Повторить ход',
                         'Включить/Выключить раскраску исходных элементов',
                         'Выйти'
                     ])
@@ -502,9 +2348,35 @@ class SudokuGame:
                     elif(menu_item == '2'):
                         SudokuGame._print_rules()
                     elif (menu_item == '3'):
-                        SudokuGame._save_game(grid)
-                        print('Игра сохранена!')
+                        hint = tracker.get_hint()
+                        if hint:
+                            print('В клетку ({}, {}) можно поставить только '
+                                  '{}'.format(hint[0] + 1, hint[1] + 1,
+                                              hint[2]))
+                        else:
+                            print('Нет клеток с единственным кандидатом!')
                     elif (menu_item == '4'):
+                        SudokuGame._print_candidates(tracker)
+                    elif (menu_item == '5'):
+                        name = SudokuGame._get_slot_name()
+                        if name:
+                            slot = slot.save_as(name)
+                            print(f'Игра сохранена в слот {name}!')
+                    elif (menu_item in ('6', '7')):
+                        if menu_item == '6':
+                            move = slot.undo(grid)
+                        else:
+                            move = slot.redo(grid)
+
+                        if move:
+                            tracker.update(move[0], move[1])
+                            grid.show()
+                            SudokuGame._print_dead_ends(tracker)
+                        elif menu_item == '6':
+                            print('Нет ходов для отмены!')
+                        else:
+                            print('Нет отмененных ходов!')
+                    elif (menu_item == '8'):
                         grid.colorize = not grid.colorize
                         grid.show()
                     else:
@@ -526,14 +2398,18 @@ class SudokuGame:
                 answ[0] -= 1
                 answ[1] -= 1
 
+            old = grid.get_cell(answ[0], answ[1])
             if not grid.fill_cell(*answ):
                 print(
                     'Введенные данные не соответствуют правилам игры!\n'
                     'Попробуйте еще раз.'
                 )
                 continue
+            slot.record(*answ[:2], old, answ[2])
+            tracker.update(answ[0], answ[1])
 
             grid.show()
+            SudokuGame._print_dead_ends(tracker)
         else:
             print('Победа!')
 
@@ -590,10 +2466,24 @@ class SudokuGame:
         print('Режим игры для компьютера')
 
         solver = SudokuSolver()
-        solver.print_steps = True
         grid = Grid(num_drop_cells=81 - SudokuGame._get_num_of_cells())
         configure_print(grid)
-        solver.get_solution(grid)
+
+        # шаги рисуются не чаще, чем раз в задержку (или 60 раз
+        # в секунду), промежуточные шаги пропускаются
+        renderer = GridRenderer(grid)
+        renderer.draw()
+        for row, col, number, kind in solver.iter_steps(grid):
+            if kind == 'place':
+                renderer.draw(f'({row + 1}, {col + 1}, {number})')
+            else:
+                renderer.draw(f'Отмена ({row + 1}, {col + 1}, {number})')
+        renderer.close()
+
+        if grid.check_grid():
+            print('Решение найдено!')
+        else:
+            print('Решения нет!')
 
     @staticmethod
     def _get_num_of_cells():
@@ -617,5 +2507,6 @@ class SudokuGame:
         return 35
 
 
-game = SudokuGame()
-game.start_game()
+if __name__ == '__main__':
+    game = SudokuGame()
+    game.start_game()
@@ -0,0 +1,181 @@
+import os
+import sys
+import time
+import argparse
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmark_utils import get_percentile
+from sudoku import (Grid, SudokuSolver, DancingLinksSolver, grid_to_line,
+                    line_to_grid)
+
+SOLVERS = {'bitmask': SudokuSolver, 'dlx': DancingLinksSolver}
+
+
+def solve_chunk_numpy(lines):
+    """
+    Функция решения группы головоломок распространением ограничений
+    в NumPy сразу для всей группы (головоломки группируются по размеру),
+    нерешенные досчитываются перебором
+    :param lines: list - головоломки, записанные в одну строку
+    :return: list - пары (решение или пустая строка, время в секундах).
+    Время некорректной строки - None
+    """
+    # numpy нужен только этому решателю
+    from sudoku_vectorized import solve_batch
+
+    result = [('', None)] * len(lines)
+    groups = {}
+    for k, line in enumerate(lines):
+        try:
+            field = line_to_grid(line)
+        except ValueError:
+            continue
+        groups.setdefault(len(field), []).append((k, field))
+
+    for group in groups.values():
+        solutions = solve_batch([field for k, field in group])
+        for (k, field), (solution, seconds) in zip(group, solutions):
+            result[k] = (grid_to_line(solution) if solution else '',
+                         seconds)
+    return result
+
+
+def solve_chunk(lines, solver='bitmask'):
+    """
+    Функция решения группы головоломок (одно задание пула)
+    :param lines: list - головоломки, записанные в одну строку
+    :param solver: str - решатель (bitmask, dlx, numpy)
+    :return: list - пары (решение или пустая строка, время в секундах).
+    Время некорректной строки - None
+    """
+    if solver == 'numpy':
+        return solve_chunk_numpy(lines)
+
+    solver = SOLVERS[solver]()
+    result = []
+    for line in lines:
+        start = time.perf_counter()
+        try:
+            grid = Grid(line_to_grid(line))
+        except ValueError:
+            result.append(('', None))
+            continue
+
+        solution = grid_to_line(grid.grid) if solver.get_solution(grid) else ''
+        result.append((solution, time.perf_counter() - start))
+    return result
+
+
+def get_chunks(lines, chunk_size):
+    """
+    Функция, которая разбивает поток строк на группы
+    :param lines: итератор строк
+    :param chunk_size: int - количество строк в группе
+    :return: генератор списков строк
+    """
+    lines = iter(lines)
+    chunk = list(islice(lines, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(lines, chunk_size))
+
+
+def solve_lines(lines, solver='bitmask', workers=None, chunk_size=1000,
+                total=None):
+    """
+    Функция решения потока головоломок в пуле процессов.
+    В работе одновременно не больше 2 * workers заданий, поэтому
+    файл не читается в память целиком. Если количество головоломок
+    известно, чтобы работа досталась каждому процессу, размер задания
+    не больше количества / (workers * 4)
+    :param lines: итератор головоломок, записанных в одну строку
+    :param solver: str - решатель (bitmask, dlx, numpy)
+    :param workers: int - количество процессов (по умолчанию - число ядер)
+    :param chunk_size: int - наибольшее количество головоломок
+    в одном задании
+    :param total: int - количество головоломок (по умолчанию - len(lines),
+    если это список; для потока неизвестно)
+    :return: генератор пар (решение, время) в порядке входных строк
+    """
+    workers = workers or os.cpu_count() or 1
+    if total is None and hasattr(lines, '__len__'):
+        total = len(lines)
+    if total is not None:
+        chunk_size = max(min(chunk_size, -(-total // (workers * 4))), 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = deque()
+        for chunk in get_chunks(lines, chunk_size):
+            tasks.append(pool.submit(solve_chunk, chunk, solver))
+            if len(tasks) >= 2 * workers:
+                yield from tasks.popleft().result()
+        while tasks:
+            yield from tasks.popleft().result()
+
+
+def main():
+    """Функция запуска решения файла с головоломками"""
+    parser = argparse.ArgumentParser(
+        description='Решение файла с головоломками Судоку '
+                    '(одна головоломка в строке, пустая клетка - . или 0)'
+    )
+    parser.add_argument('input',
+                        help='файл с головоломками (- - стандартный ввод)')
+    parser.add_argument('-o', '--output', default='solutions.txt',
+                        help='файл для решений (в порядке головоломок, '
+                             'для нерешенных - пустая строка)')
+    parser.add_argument('--solver', choices=[*SOLVERS, 'numpy'],
+                        default='bitmask',
+                        help='решатель (numpy - распространение ограничений '
+                             'сразу для всего задания, время решения - '
+                             'доля задания)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='количество процессов')
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help='наибольшее количество головоломок '
+                             'в одном задании')
+    args = parser.parse_args()
+
+    if args.chunk_size < 1:
+        parser.error('размер задания должен быть больше 0')
+
+    # у файла количество строк считается заранее, у стандартного
+    # ввода оно неизвестно, и размер задания остается chunk_size
+    total = None
+    if args.input == '-':
+        source = sys.stdin
+    else:
+        source = open(args.input)
+        total = sum(1 for line in source)
+        source.seek(0)
+    latency = []
+    num_solved = num_invalid = 0
+
+    start = time.perf_counter()
+    with source, open(args.output, 'w') as file:
+        lines = (line.rstrip('\r\n') for line in source)
+        for solution, seconds in solve_lines(lines, args.solver,
+                                             args.workers, args.chunk_size,
+                                             total):
+            file.write(solution + '\n')
+            if seconds is None:
+                num_invalid += 1
+                continue
+            latency.append(seconds)
+            num_solved += bool(solution)
+    seconds = time.perf_counter() - start
+
+    count = len(latency) + num_invalid
+    latency.sort()
+    print(f'{count} головоломок за {seconds:.2f} с '
+          f'({count / seconds:.1f} в секунду): решено {num_solved}, '
+          f'нет решения {len(latency) - num_solved}, '
+          f'некорректных строк {num_invalid}')
+    if latency:
+        print(f'время решения: p50 {get_percentile(latency, 50) * 1000:.3f} '
+              f'мс, p99 {get_percentile(latency, 99) * 1000:.3f} мс')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+import os
+import json
+import random
+import platform
+import argparse
+
+from benchmark_utils import measure, get_percentile, get_revision
+from sudoku import (Grid, SudokuSolver, DancingLinksSolver, SudokuGenerator,
+                    grid_to_line, line_to_grid, rate_puzzle)
+
+SOLVERS = {'bitmask': SudokuSolver, 'dlx': DancingLinksSolver}
+
+# показатели итогов, которые сравниваются с предыдущим отчетом
+METRICS = ['seconds_total', 'seconds_p50', 'seconds_p99', 'nodes_mean',
+           'peak_bytes_max']
+
+
+def load_corpus(path):
+    """
+    Функция чтения набора головоломок (одна головоломка в строке,
+    пустая клетка - . или 0)
+    :param path: str - путь к файлу
+    :return: list - головоломки, записанные в одну строку
+    """
+    with open(path) as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def get_corpora(directory, names=None):
+    """
+    Функция, которая находит наборы головоломок
+    :param directory: str - директория с .txt файлами
+    :param names: list - имена наборов (по умолчанию - все)
+    :return: dict - имя набора -> путь к файлу
+    """
+    corpora = {
+        os.path.splitext(name)[0]: os.path.join(directory, name)
+        for name in sorted(os.listdir(directory)) if name.endswith('.txt')
+    }
+    if names is None:
+        return corpora
+    return {name: corpora[name] for name in names}
+
+
+def solve(field, solver):
+    """
+    Функция решения одной головоломки
+    :param field: list - игровое поле
+    :param solver: решатель
+    :return: Grid - сетка с решением или None
+    """
+    grid = Grid(field)
+    return grid if solver.get_solution(grid) else None
+
+
+def check(grid, count=1000):
+    """
+    Функция многократной проверки поля (одна проверка слишком быстрая
+    для замера)
+    :param grid: Grid - сетка игрового поля
+    :param count: int - количество проверок
+    :return: bool - результат проверки
+    """
+    for i in range(count):
+        result = grid.check_grid()
+    return result
+
+
+def generate(box_size, seed):
+    """
+    Функция генерации минимальной головоломки с заданным зерном
+    :param box_size: int - размер квадрата n (поле n^2 x n^2)
+    :param seed: int - зерно генератора
+    :return: list - игровое поле
+    """
+    return SudokuGenerator(box_size, seed).get_puzzle()
+
+
+def drop_cells(field, n, seed):
+    """
+    Функция удаления клеток Grid._drop_cells с заданным зерном
+    :param field: list - заполненное игровое поле
+    :param n: int - количество клеток, которые будут удалены
+    :param seed: int - зерно генератора
+    :return: list - игровое поле
+    """
+    random.seed(seed)
+    return Grid(field)._drop_cells(field, n)
+
+
+def summarize(items):
+    """
+    Функция подсчета итогов по замерам отдельных головоломок
+    :param items: list - замеры (dict с seconds, peak_bytes, nodes)
+    :return: dict - итоги
+    """
+    seconds = [item['seconds'] for item in items]
+    nodes = [item['nodes'] for item in items if item.get('nodes') is not None]
+    peaks = [item['peak_bytes'] for item in items
+             if item['peak_bytes'] is not None]
+    return {
+        'count': len(items),
+        'seconds_total': sum(seconds),
+        'seconds_p50': get_percentile(seconds, 50),
+        'seconds_p99': get_percentile(seconds, 99),
+        'seconds_max': max(seconds, default=None),
+        'nodes_mean': sum(nodes) / len(nodes) if nodes else None,
+        'peak_bytes_max': max(peaks, default=None)
+    }
+
+
+def run_corpus(name, lines, solver_name, memory=True, repeat=1):
+    """
+    Функция, которая решает все головоломки набора одним решателем
+    :param name: str - имя набора
+    :param lines: list - головоломки, записанные в одну строку
+    :param solver_name: str - решатель (bitmask, dlx)
+    :param memory: bool - замерять ли память
+    :param repeat: int - сколько раз замерять время (берется лучшее)
+    :return: dict - результаты замеров
+    """
+    solver = SOLVERS[solver_name]()
+    items = []
+    for line in lines:
+        field = line_to_grid(line)
+        grid, seconds, peak = measure(solve, field, solver, memory=memory,
+                                      repeat=repeat)
+        item = {'puzzle': line, 'seconds': seconds, 'peak_bytes': peak,
+                'solved': grid is not None, 'nodes': None}
+        if isinstance(solver, SudokuSolver):
+            stats = solver.stats
+            item.update(nodes=stats.nodes, backtracks=stats.backtracks,
+                        difficulty=rate_puzzle(field).difficulty)
+        if grid is not None:
+            item['solution'] = grid_to_line(grid.grid)
+            count = 1000
+            valid, seconds, peak = measure(check, grid, count, memory=False,
+                                           repeat=repeat)
+            item['check_grid'] = valid
+            item['check_grid_seconds'] = seconds / count
+        items.append(item)
+
+    return {'case': f'{name}/{solver_name}', 'items': items,
+            'summary': summarize(items)}
+
+
+def run_generation(count, seed, box_size=3, num_drop_cells=46, memory=True):
+    """
+    Функция замера генерации головоломок с заданными зернами:
+    минимальная головоломка (SudokuGenerator.get_puzzle)
+    и удаление клеток игрового поля (Grid._drop_cells)
+    :param count: int - количество головоломок
+    :param seed: int - зерно генератора (головоломка i получает seed + i)
+    :param box_size: int - размер квадрата n (поле n^2 x n^2)
+    :param num_drop_cells: int - количество клеток, которые удаляет
+    Grid._drop_cells
+    :param memory: bool - замерять ли память
+    :return: list - результаты замеров (get_puzzle, drop_cells)
+    """
+    puzzles = []
+    drops = []
+    for i in range(count):
+        field, seconds, peak = measure(generate, box_size, seed + i,
+                                       memory=memory)
+        line = grid_to_line(field)
+        puzzles.append({'seed': seed + i, 'puzzle': line,
+                        'clues': len(line) - line.count('.'),
+                        'seconds': seconds, 'peak_bytes': peak})
+
+        full = SudokuGenerator(box_size, seed + i).get_full_grid()
+        field, seconds, peak = measure(drop_cells, full, num_drop_cells,
+                                       seed + i, memory=memory)
+        drops.append({'seed': seed + i, 'puzzle': grid_to_line(field),
+                      'seconds': seconds, 'peak_bytes': peak})
+
+    suffix = f'{box_size ** 2}x{box_size ** 2}'
+    return [
+        {'case': f'get_puzzle/{suffix}', 'items': puzzles,
+         'summary': summarize(puzzles)},
+        {'case': f'drop_cells/{suffix}', 'items': drops,
+         'summary': summarize(drops)}
+    ]
+
+
+def compare_reports(old, new):
+    """
+    Функция сравнения итогов двух отчетов
+    :param old: dict - предыдущий отчет
+    :param new: dict - текущий отчет
+    :return: list - строки сравнения (набор, показатель, было, стало,
+    отношение было / стало: больше 1 - стало быстрее или меньше).
+    Сравниваются только наборы с одинаковым количеством замеров
+    """
+    previous = {result['case']: result['summary']
+                for result in old['results']}
+    rows = []
+    for result in new['results']:
+        summary = previous.get(result['case'])
+        if summary is None or summary['count'] != result['summary']['count']:
+            continue
+        for metric in METRICS:
+            before = summary.get(metric)
+            after = result['summary'].get(metric)
+            if before is None or after is None:
+                continue
+            rows.append({'case': result['case'], 'metric': metric,
+                         'old': before, 'new': after,
+                         'ratio': before / after if after else None})
+    return rows
+
+
+def main():
+    """Функция запуска замеров"""
+    parser = argparse.ArgumentParser(
+        description='Замеры решения и генерации Судоку на наборах '
+                    'головоломок (без отрисовки и задержек)'
+    )
+    parser.add_argument('--corpora',
+                        default=os.path.join(
+                            os.path.dirname(os.path.abspath(__file__)),
+                            'sudoku_corpora'
+                        ),
+                        help='директория с наборами головоломок (.txt)')
+    parser.add_argument('--sets',
+                        help='наборы через запятую (по умолчанию - все)')
+    parser.add_argument('--solvers', default='bitmask,dlx',
+                        help='решатели через запятую: ' + ', '.join(SOLVERS))
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='сколько раз замерять время (берется лучшее)')
+    parser.add_argument('--generate', type=int, default=10,
+                        help='количество головоломок для замера генерации')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='зерно генератора')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='не замерять пиковую память')
+    parser.add_argument('--compare',
+                        help='предыдущий отчет (.json) для сравнения')
+    parser.add_argument('--report',
+                        help='готовый отчет (.json): сравнить его '
+                             'с --compare без замеров')
+    parser.add_argument('-o', '--output', default='sudoku_benchmark.json',
+                        help='файл с результатами (.json)')
+    args = parser.parse_args()
+
+    solvers = args.solvers.split(',')
+    for name in solvers:
+        if name not in SOLVERS:
+            parser.error(f'неизвестный решатель: {name}')
+    if args.repeat < 1:
+        parser.error('количество замеров должно быть больше 0')
+    if args.report and not args.compare:
+        parser.error('--report используется только вместе с --compare')
+
+    if args.report:
+        with open(args.report) as file:
+            report = json.load(file)
+    else:
+        try:
+            corpora = get_corpora(
+                args.corpora, args.sets.split(',') if args.sets else None
+            )
+        except (OSError, KeyError) as error:
+            parser.error(f'не найден набор головоломок: {error}')
+
+        results = []
+        for name, path in corpora.items():
+            lines = load_corpus(path)
+            for solver in solvers:
+                results.append(run_corpus(name, lines, solver,
+                                          not args.no_memory, args.repeat))
+        if args.generate > 0:
+            results += run_generation(args.generate, args.seed,
+                                      memory=not args.no_memory)
+
+        for result in results:
+            summary = result['summary']
+            nodes = summary['nodes_mean']
+            print(f"{result['case']}: {summary['count']} шт., "
+                  f"всего {summary['seconds_total']:.3f}s, "
+                  f"p50 {summary['seconds_p50'] * 1000:.3f} мс, "
+                  f"p99 {summary['seconds_p99'] * 1000:.3f} мс"
+                  + (f', узлов в среднем {nodes:.1f}' if nodes else ''))
+
+        report = {
+            'revision': get_revision(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'results': results
+        }
+
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)
+        report['compared_with'] = previous.get('revision')
+        report['comparison'] = compare_reports(previous, report)
+        for row in report['comparison']:
+            ratio = f"{row['ratio']:.2f}x" if row['ratio'] else '-'
+            print(f"{row['case']} {row['metric']}: {row['old']:.6g} -> "
+                  f"{row['new']:.6g} ({ratio})")
+
+    if not args.report:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
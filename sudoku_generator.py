@@ -0,0 +1,121 @@
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from sudoku import SudokuGenerator, DIFFICULTY_BANDS, grid_to_line
+
+
+def generate_chunk(count, box_size=3, num_clues=None, seed=None,
+                   difficulty=None, attempts=100):
+    """
+    Функция генерации группы головоломок (одно задание пула)
+    :param count: int - количество головоломок
+    :param box_size: int - размер квадрата n (поле n^2 x n^2)
+    :param num_clues: int - желаемое количество заполненных клеток
+    :param seed: зерно генератора случайных чисел
+    :param difficulty: str или tuple - диапазон оценки сложности
+    :param attempts: int - сколько головоломок пробовать
+    для попадания в диапазон
+    :return: list - головоломки, записанные в одну строку
+    """
+    generator = SudokuGenerator(box_size, seed)
+    return [grid_to_line(generator.get_puzzle(num_clues, difficulty,
+                                              attempts))
+            for i in range(count)]
+
+
+def generate_puzzles(count, box_size=3, num_clues=None, workers=None,
+                     chunk_size=100, seed=None, difficulty=None,
+                     attempts=100):
+    """
+    Функция генерации головоломок в пуле процессов
+    :param count: int - количество головоломок
+    :param box_size: int - размер квадрата n (поле n^2 x n^2)
+    :param num_clues: int - желаемое количество заполненных клеток
+    :param workers: int - количество процессов (по умолчанию - число ядер)
+    :param chunk_size: int - количество головоломок в одном задании
+    :param seed: int - зерно генератора (задание i получает seed + i)
+    :param difficulty: str или tuple - диапазон оценки сложности
+    :param attempts: int - сколько головоломок пробовать
+    для попадания в диапазон
+    :return: генератор головоломок, записанных в одну строку
+    """
+    sizes = [min(chunk_size, count - start)
+             for start in range(0, count, chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = [
+            pool.submit(generate_chunk, size, box_size, num_clues,
+                        None if seed is None else seed + i,
+                        difficulty, attempts)
+            for i, size in enumerate(sizes)
+        ]
+        for task in tasks:
+            yield from task.result()
+
+
+def main():
+    """Функция запуска генерации"""
+    parser = argparse.ArgumentParser(
+        description='Генерация головоломок Судоку с единственным решением'
+    )
+    parser.add_argument('-n', '--count', type=int, default=1000,
+                        help='количество головоломок')
+    parser.add_argument('-o', '--output', default='puzzles.txt',
+                        help='файл для записи (одна головоломка в строке)')
+    parser.add_argument('--box', type=int, default=3,
+                        help='размер квадрата n (поле n^2 x n^2)')
+    parser.add_argument('--clues', type=int, default=None,
+                        help='желаемое количество заполненных клеток '
+                             '(по умолчанию - минимальные головоломки)')
+    parser.add_argument('--difficulty',
+                        help='диапазон сложности: '
+                             + ', '.join(DIFFICULTY_BANDS)
+                             + ' или два числа через запятую: 3,8')
+    parser.add_argument('--attempts', type=int, default=100,
+                        help='сколько головоломок пробовать для попадания '
+                             'в диапазон сложности')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='количество процессов')
+    parser.add_argument('--chunk-size', type=int, default=100,
+                        help='количество головоломок в одном задании')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='зерно генератора')
+    args = parser.parse_args()
+
+    if args.count < 1:
+        parser.error('количество головоломок должно быть больше 0')
+    if not 2 <= args.box <= 5:
+        parser.error('размер квадрата должен быть от 2 до 5')
+    if args.chunk_size < 1:
+        parser.error('размер задания должен быть больше 0')
+
+    difficulty = args.difficulty
+    if difficulty is not None and difficulty not in DIFFICULTY_BANDS:
+        try:
+            low, high = map(float, difficulty.split(','))
+        except ValueError:
+            parser.error(f'некорректный диапазон сложности: {difficulty}')
+        difficulty = (low, high)
+
+    start = time.perf_counter()
+    num_clues = 0
+    with open(args.output, 'w') as file:
+        try:
+            for line in generate_puzzles(args.count, args.box, args.clues,
+                                         args.workers, args.chunk_size,
+                                         args.seed, difficulty,
+                                         args.attempts):
+                num_clues += len(line) - line.count('.')
+                file.write(line + '\n')
+        except RuntimeError as error:
+            parser.exit(1, f'{error}\n')
+    seconds = time.perf_counter() - start
+
+    print(f'{args.count} головоломок за {seconds:.2f} с '
+          f'({args.count / seconds:.1f} в секунду), '
+          f'в среднем {num_clues / args.count:.1f} заполненных клеток')
+
+
+if __name__ == '__main__':
+    main()
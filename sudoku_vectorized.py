@@ -0,0 +1,161 @@
+import time
+
+import numpy as np
+
+from sudoku import Grid, SudokuSolver
+
+# размер квадрата -> (клетки строк, столбцов и квадратов (3n^2, n^2),
+# строки, столбцы и квадраты каждой клетки (n^4, 3))
+_units = {}
+
+
+def get_units(box):
+    """
+    Функция, которая строит (или берет готовые) массивы индексов
+    строк, столбцов и квадратов для поля заданного размера
+    :param box: int - размер квадрата n
+    :return: tuple - units, cell_units
+    """
+    if box not in _units:
+        size = box * box
+        cells = np.arange(size * size).reshape(size, size)
+        boxes = (cells.reshape(box, box, box, box).transpose(0, 2, 1, 3)
+                 .reshape(size, size))
+        units = np.concatenate([cells, cells.T, boxes])
+
+        cell_units = np.empty((size * size, 3), dtype=np.intp)
+        for u, unit in enumerate(units):
+            cell_units[unit, u // size] = u
+        _units[box] = units, cell_units
+    return _units[box]
+
+
+def to_candidates(values, size):
+    """
+    Функция, которая строит битовые маски кандидатов по значениям клеток
+    (бит d - 1 - цифра d, как в SudokuSolver)
+    :param values: np.ndarray - значения клеток (N, n^4), 0 - пустая
+    :param size: int - размер поля n^2
+    :return: np.ndarray - маски кандидатов (N, n^4): у заполненной
+    клетки один кандидат, у пустой - все
+    """
+    dtype = np.uint16 if size <= 16 else np.uint32
+    values = values.astype(dtype)
+    full = dtype((1 << size) - 1)
+    return np.where(values > 0, dtype(1) << (values - 1), full)
+
+
+def to_values(cand):
+    """
+    Функция, которая записывает значения клеток с одним кандидатом
+    :param cand: np.ndarray - маски кандидатов (N, n^4)
+    :return: np.ndarray - значения клеток (N, n^4), 0 - не решена
+    """
+    single = (cand != 0) & (cand & (cand - 1) == 0)
+    digits = np.log2(np.where(single, cand, 1)).astype(np.uint8) + 1
+    return np.where(single, digits, 0).astype(np.uint8)
+
+
+def count_places(masks):
+    """
+    Функция, которая для каждой строки, столбца или квадрата находит
+    цифры, встречающиеся в масках его клеток хотя бы один раз
+    и больше одного раза
+    :param masks: np.ndarray - маски клеток (N, 3n^2, n^2)
+    :return: tuple - маски (N, 3n^2): хотя бы раз, больше одного раза
+    """
+    once = np.zeros(masks.shape[:2], dtype=masks.dtype)
+    twice = np.zeros_like(once)
+    for k in range(masks.shape[2]):
+        twice |= once & masks[:, :, k]
+        once |= masks[:, :, k]
+    return once, twice
+
+
+def propagate(cand, box):
+    """
+    Функция распространения ограничений сразу для всех головоломок:
+    цифра решенной клетки вычеркивается из ее строки, столбца
+    и квадрата, клетка с единственным кандидатом и единственное место
+    для цифры в строке, столбце или квадрате становятся решенными.
+    Шаги повторяются, пока головоломки меняются; каждый шаг работает
+    только с головоломками, изменившимися на предыдущем
+    :param cand: np.ndarray - маски кандидатов (N, n^4),
+    изменяются на месте
+    :param box: int - размер квадрата n
+    :return: np.ndarray - (N,) bool, True - получено противоречие
+    (решения нет)
+    """
+    units, cell_units = get_units(box)
+    full = (1 << box * box) - 1
+    dead = np.zeros(len(cand), dtype=bool)
+    active = np.arange(len(cand))
+
+    while len(active):
+        part = cand[active]
+        before = part.copy()
+
+        # вычеркивание цифр решенных клеток
+        single = part & (part - 1) == 0
+        placed, repeated = count_places(np.where(single, part, 0)[:, units])
+        conflict = (repeated != 0).any(axis=1)
+        taken = np.bitwise_or.reduce(placed[:, cell_units], axis=2)
+        part = np.where(single, part, part & ~taken)
+
+        # единственное место для цифры в строке, столбце или квадрате
+        once, twice = count_places(part[:, units])
+        conflict |= (once != full).any(axis=1)
+        only = np.bitwise_or.reduce((once & ~twice)[:, cell_units], axis=2)
+        forced = part & only
+        conflict |= (forced & (forced - 1) != 0).any(axis=1)
+        part = np.where(forced != 0, forced, part)
+
+        conflict |= (part == 0).any(axis=1)
+        cand[active] = part
+        dead[active] = conflict
+
+        changed = (part != before).any(axis=1)
+        active = active[changed & ~conflict]
+    return dead
+
+
+def solve_batch(fields, solver=None):
+    """
+    Функция решения группы головоломок одного размера: сначала
+    распространение ограничений для всех головоломок сразу,
+    затем перебор (SudokuSolver) только для нерешенных
+    :param fields: list - игровые поля одного размера
+    :param solver: решатель для нерешенных головоломок
+    (по умолчанию - SudokuSolver)
+    :return: list - пары (решение или None, время в секундах):
+    время распространения делится поровну между головоломками,
+    время перебора добавляется той головоломке, которую решали
+    """
+    if not fields:
+        return []
+    solver = solver if solver is not None else SudokuSolver()
+    size = len(fields[0])
+    box = int(round(size ** 0.5))
+
+    start = time.perf_counter()
+    values = np.array(fields, dtype=np.uint8).reshape(len(fields), -1)
+    cand = to_candidates(values, size)
+    dead = propagate(cand, box)
+    values = to_values(cand)
+    solved = values.all(axis=1) & ~dead
+    shared = (time.perf_counter() - start) / len(fields)
+
+    result = []
+    for puzzle, is_dead, is_solved in zip(values, dead, solved):
+        if is_solved:
+            result.append((puzzle.reshape(size, size).tolist(), shared))
+            continue
+
+        start = time.perf_counter()
+        solution = None
+        if not is_dead:
+            grid = Grid.from_values(puzzle.tobytes())
+            if solver.get_solution(grid):
+                solution = grid.grid
+        result.append((solution, shared + time.perf_counter() - start))
+    return result
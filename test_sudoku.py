@@ -0,0 +1,141 @@
+import os
+import time
+import random
+
+import pytest
+
+from sudoku import (Grid, SudokuSolver, DancingLinksSolver, SudokuGenerator,
+                    CachingSolver, SolverStats, DIFFICULTY_BANDS, canonicalize,
+                    count_solutions, grid_to_line, line_to_grid,
+                    rate_puzzle)
+
+PUZZLE = ('.......1.4.........2...........5.4.7..8...3....1.9....'
+          '3..4..2...5.1........8.6...')
+# головоломка, для которой нужен перебор
+HARD_PUZZLE = ('1....7.9..3..2...8..96..5....53..9...1..8...26....4...'
+               '3......1..4......7..7...3..')
+
+
+def get_base_grid(box):
+    """
+    Функция построения заполненного поля по образцу (как в Grid)
+    :param box: int - размер квадрата n
+    :return: list - игровое поле
+    """
+    size = box * box
+    return [[(x + box * t + t // box) % size + 1 for x in range(size)]
+            for t in range(size)]
+
+
+def test_canonicalize_same_form_for_transformed_copy():
+    field = line_to_grid(PUZZLE)
+    copy = [list(row) for row in zip(*field)]
+    copy = copy[3:6] + copy[:3] + copy[6:]
+    copy = [[(val % 9) + 1 if val else 0 for val in row] for row in copy]
+    assert canonicalize(field)[0] == canonicalize(copy)[0]
+
+
+@pytest.mark.parametrize('box', [3, 4])
+def test_canonicalize_base_grid_stops_at_budget(box):
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError):
+        canonicalize(get_base_grid(box), max_nodes=1000)
+    assert time.perf_counter() - start < 5
+
+
+def test_caching_solver_falls_back_on_symmetric_grid():
+    field = get_base_grid(4)
+    for i, j in [(0, 0), (3, 5), (7, 7), (10, 2), (15, 15)]:
+        field[i][j] = 0
+    grid = Grid(field)
+    solver = CachingSolver()
+
+    start = time.perf_counter()
+    assert solver.get_solution(grid)
+    assert time.perf_counter() - start < 5
+    assert grid_to_line(grid.grid) == grid_to_line(get_base_grid(4))
+    assert len(solver.cache) == 0
+
+
+def test_caching_solver_hit_for_transformed_copy():
+    field = line_to_grid(PUZZLE)
+    solver = CachingSolver()
+    assert solver.get_solution(Grid(field))
+
+    grid = Grid([list(row) for row in zip(*field)])
+    expected = Grid([list(row) for row in zip(*field)])
+    SudokuSolver().get_solution(expected)
+    assert solver.get_solution(grid)
+    assert grid.grid == expected.grid
+    assert solver.cache.hits == 1
+
+
+def test_generator_small_grid_puzzles_are_unique():
+    generator = SudokuGenerator(2, seed=1)
+    for i in range(50):
+        assert all(map(all, generator.get_full_grid()))
+        assert count_solutions(generator.get_puzzle()) == 1
+
+
+def test_grid_property_is_read_only():
+    grid = Grid(line_to_grid(PUZZLE))
+    with pytest.raises(TypeError):
+        grid.grid[0][0] = 5
+    assert grid.fill_cell(0, 0, 5)
+    assert grid.grid[0][0] == 5
+
+
+def test_rate_puzzle_ignores_digit_labels():
+    field = line_to_grid(HARD_PUZZLE)
+    difficulty = rate_puzzle(field).difficulty
+    for shift in range(1, 9):
+        copy = [[(val + shift - 1) % 9 + 1 if val else 0 for val in row]
+                for row in field]
+        assert rate_puzzle(copy).difficulty == difficulty
+
+
+@pytest.mark.parametrize('line', ['', '   ', '1', '.' * 80, '.' * 82])
+def test_line_to_grid_rejects_bad_length(line):
+    with pytest.raises(ValueError):
+        line_to_grid(line)
+
+
+def test_drop_cells_rejects_field_without_unique_solution():
+    generator = SudokuGenerator(2, seed=1)
+    with pytest.raises(RuntimeError):
+        generator.drop_cells([[0] * 4 for i in range(4)], 0)
+
+
+def test_difficulty_bands_split_at_search():
+    # без перебора, все цифры - единственное место: оценка ровно 2
+    stats = SolverStats()
+    stats.nodes, stats.hidden_singles = 1, 10
+    low, high = DIFFICULTY_BANDS['medium']
+    assert low <= stats.difficulty < high
+
+    # наименьшее дерево перебора: корень и две пробные цифры
+    stats.nodes, stats.hidden_singles = 3, 0
+    low, high = DIFFICULTY_BANDS['hard']
+    assert low <= stats.difficulty < high
+
+
+def test_dancing_links_25x25_under_a_second():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'sudoku_corpora', '25x25.txt')
+    with open(path) as file:
+        fields = [line_to_grid(line) for line in file if line.strip()]
+
+    # случайно удаленные клетки вне области перехода (45% пустых)
+    for seed in range(3):
+        field = get_base_grid(5)
+        cells = random.Random(seed).sample(range(625), 280)
+        for k in cells:
+            field[k // 25][k % 25] = 0
+        fields.append(field)
+
+    for field in fields:
+        grid = Grid(field)
+        start = time.perf_counter()
+        assert DancingLinksSolver().get_solution(grid)
+        assert time.perf_counter() - start < 1
+        assert grid.check_grid()